@@ -0,0 +1,81 @@
+# recall@k vs query latency for the index kinds in utils.index_store.
+#
+#   python -m benchmarks.bench_ann --vectors 20000 --dim 768
+#
+# Vectors are synthetic: points scattered around random cluster centres,
+# which is closer to real chunk embeddings than uniform noise. Ground truth
+# comes from the flat (exact) index.
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from utils.index_store import build_faiss_index
+
+
+def synthetic(count, dimension, clusters, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dimension)).astype("float32")
+    labels = rng.integers(0, clusters, size=count)
+    vectors = centres[labels] + 0.3 * rng.normal(size=(count, dimension)).astype("float32")
+    return vectors.astype("float32")
+
+
+def recall(found, truth):
+    k = truth.shape[1]
+    return np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+
+
+def measure(name, index, queries, truth, k):
+    # 한 질문씩 single thread로 (페이지에서 retriever가 쓰는 방식)
+    threads = faiss.omp_get_max_threads()
+    faiss.omp_set_num_threads(1)
+    started = time.perf_counter()
+    for query in queries:
+        index.search(query[None, :], k)
+    per_query = (time.perf_counter() - started) / len(queries)
+    faiss.omp_set_num_threads(threads)
+    _, found = index.search(queries, k)
+    print(f"{name:<28}{recall(found, truth):>10.3f}{per_query * 1000:>12.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    vectors = synthetic(args.vectors, args.dim, args.clusters)
+    queries = synthetic(args.queries, args.dim, args.clusters, seed=1)
+
+    print(f"{args.vectors} vectors, dim {args.dim}, k={args.k}")
+    print(f"{'index':<28}{'recall@k':>10}{'ms/query':>12}")
+    for kind in ("flat", "ivfpq", "hnsw"):
+        started = time.perf_counter()
+        index = build_faiss_index(vectors, kind)
+        build_time = time.perf_counter() - started
+        if kind == "flat":
+            _, truth = index.search(queries, args.k)
+        print(f"-- {kind}: built in {build_time:.2f}s")
+        if kind == "ivfpq":
+            # IndexRefineFlat: IVF-PQ가 k * k_factor개 후보를 찾고 원래 벡터로 다시 정렬
+            ivf = faiss.extract_index_ivf(index)
+            for nprobe in (1, 4, 16, 64):
+                ivf.nprobe = nprobe
+                for k_factor in (1, 8, 32):
+                    index.k_factor = k_factor
+                    measure(f"ivfpq nprobe={nprobe} k_factor={k_factor}", index, queries, truth, args.k)
+        elif kind == "hnsw":
+            for ef in (16, 64, 256):
+                index.hnsw.efSearch = ef
+                measure(f"hnsw efSearch={ef}", index, queries, truth, args.k)
+        else:
+            measure("flat", index, queries, truth, args.k)
+
+
+if __name__ == "__main__":
+    main()
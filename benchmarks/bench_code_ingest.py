@@ -0,0 +1,131 @@
+# Whole-file vs chunked code ingestion: embedding time and retrieval quality.
+#
+#   python -m benchmarks.bench_code_ingest path/to/repo
+#   python -m benchmarks.bench_code_ingest path/to/repo --base-url http://localhost:11434 --model llama3:latest
+#
+# Queries are the names of functions/classes defined in the repo; a retrieved
+# chunk is relevant when it contains that definition. Without --base-url a
+# hashing bag-of-identifiers embedder is used so the script runs offline.
+import argparse
+import math
+import os
+import re
+import time
+import zlib
+
+from langchain.vectorstores.faiss import FAISS
+from langchain_core.embeddings import Embeddings
+
+from utils.code_ingest import CODE_LANGUAGES, code_splitter, iter_code
+from utils.embeddings import BatchedOllamaEmbeddings
+
+DEFINITION = {
+    "python": re.compile(r"^\s*(?:async\s+)?(?:def|class)\s+(\w+)", re.M),
+    "cpp": re.compile(r"^[\w:<>,*&\s]+?\b(\w+)\s*\([^;{]*\)\s*(?:const\s*)?\{", re.M),
+}
+
+
+class HashingEmbeddings(Embeddings):
+    def __init__(self, size=512):
+        self.size = size
+
+    def _embed(self, text):
+        vector = [0.0] * self.size
+        for word in re.findall(r"[A-Za-z_][A-Za-z0-9_]*", text):
+            for part in [word] + re.split(r"_|(?<=[a-z])(?=[A-Z])", word):
+                if part:
+                    vector[zlib.crc32(part.lower().encode()) % self.size] += 1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def collect(root):
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".") and d not in ("node_modules", "build", "venv")]
+        for name in filenames:
+            if os.path.splitext(name)[1].lower() in CODE_LANGUAGES:
+                files.append(os.path.join(dirpath, name))
+    return files
+
+
+def load(files, chunked, chunk_size=600, chunk_overlap=50):
+    docs = []
+    for path in files:
+        parsed, _ = iter_code(path, path)
+        parsed = list(parsed)
+        if chunked:
+            splitter = code_splitter(path, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+            docs.extend(splitter.split_documents(parsed))
+        else:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                docs.append(parsed[0].__class__(page_content=f.read(), metadata={"source": path}))
+    return docs
+
+
+def queries(files):
+    found = []
+    for path in files:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            code = f.read()
+        language = CODE_LANGUAGES[os.path.splitext(path)[1].lower()].value
+        for match in DEFINITION[language].finditer(code):
+            line = match.group(0).strip().splitlines()[-1][:80]
+            found.append((match.group(1), path, line))
+    return found
+
+
+def evaluate(name, docs, embeddings, found, k):
+    texts = [doc.page_content for doc in docs]
+    started = time.perf_counter()
+    vectors = embeddings.embed_documents(texts)
+    embed_time = time.perf_counter() - started
+    store = FAISS.from_embeddings(list(zip(texts, vectors)), embeddings, metadatas=[d.metadata for d in docs])
+
+    hits = precision = context = 0.0
+    started = time.perf_counter()
+    for symbol, path, line in found:
+        results = store.similarity_search(symbol, k=k)
+        relevant = [d for d in results if d.metadata["source"] == path and line in d.page_content]
+        hits += bool(relevant)
+        precision += len(relevant) / k
+        context += sum(len(d.page_content) for d in results)
+    search_time = time.perf_counter() - started
+    n = len(found) or 1
+    print(
+        f"{name:<12}{len(docs):>8}{embed_time:>10.2f}s{len(docs) / embed_time:>10.1f}"
+        f"{hits / n:>9.2f}{precision / n:>9.3f}{context / n:>12.0f}{search_time / n * 1000:>10.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("repo")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=600)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument("--base-url")
+    parser.add_argument("--model", default="llama3:latest")
+    args = parser.parse_args()
+
+    if args.base_url:
+        embeddings = BatchedOllamaEmbeddings(model=args.model, base_url=args.base_url)
+    else:
+        embeddings = HashingEmbeddings()
+    files = collect(args.repo)
+    found = queries(files)
+    print(f"{len(files)} files, {len(found)} definition queries, k={args.k}")
+    print(f"{'mode':<12}{'docs':>8}{'embed':>11}{'docs/s':>10}{'hit@k':>9}{'P@k':>9}{'ctx chars':>12}{'ms/query':>10}")
+    evaluate("whole-file", load(files, chunked=False), embeddings, found, args.k)
+    chunks = load(files, chunked=True, chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+    evaluate("chunked", chunks, embeddings, found, args.k)
+
+
+if __name__ == "__main__":
+    main()
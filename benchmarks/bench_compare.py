@@ -0,0 +1,71 @@
+# Fan-out of one question to several backends: concurrent vs one after another.
+#
+#   python -m benchmarks.bench_compare
+#   python -m benchmarks.bench_compare --tokens 400
+#
+# Each backend is a stub server (benchmarks.stub_ollama) with its own
+# request and per-token latency, roughly shaped like the real service, and
+# is priced as the model it stands in for. Answers run as utils.async_runner
+# generations, like on the comparison page, and are summarised with
+# utils.compare.answer_stats.
+import argparse
+import time
+
+from langchain.prompts import ChatPromptTemplate
+from langchain_community.chat_models import ChatOllama
+
+from benchmarks.stub_ollama import serve
+from utils.async_runner import start_chain
+from utils.compare import BACKENDS, answer_stats
+from utils.context import count_tokens
+
+# label: (request latency s, token latency s)
+STUBS = {
+    "Groq · llama-3.1-70b": (0.3, 0.004),
+    "OpenAI · gpt-4o": (0.6, 0.02),
+    "OpenAI · gpt-4o-mini": (0.4, 0.012),
+    "Ollama · phi3": (0.05, 0.03),
+}
+QUESTION = "Explain how a CPU cache works, with an example."
+
+
+def wait(generations):
+    while not all(generation.finished for generation in generations):
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=200)
+    args = parser.parse_args()
+
+    prompt = ChatPromptTemplate.from_messages([("human", "{question}")])
+    chains = {}
+    for label, (request_latency, token_latency) in STUBS.items():
+        _, base_url = serve(request_latency=request_latency, token_latency=token_latency)
+        _, model = BACKENDS[label]
+        chains[label] = prompt | ChatOllama(model=model, base_url=base_url, num_predict=args.tokens)
+    prompt_tokens = count_tokens(QUESTION)
+
+    started = time.perf_counter()
+    for chain in chains.values():
+        wait([start_chain(chain, {"question": QUESTION})])
+    sequential = time.perf_counter() - started
+
+    started = time.perf_counter()
+    generations = [start_chain(chain, {"question": QUESTION}) for chain in chains.values()]
+    wait(generations)
+    concurrent = time.perf_counter() - started
+
+    print(f"{'model':<24}{'first s':>9}{'total s':>9}{'tok/s':>8}{'$ / 1k answers':>16}")
+    for label, generation in zip(chains, generations):
+        stats = answer_stats(generation, BACKENDS[label][1], prompt_tokens)
+        print(
+            f"{label:<24}{stats['first token s']:>9.2f}{stats['total s']:>9.2f}"
+            f"{stats['tokens/s']:>8.0f}{stats['cost $'] * 1000:>16.3f}"
+        )
+    print(f"wall time: one after another {sequential:.2f}s, fan-out {concurrent:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
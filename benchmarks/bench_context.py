@@ -0,0 +1,105 @@
+# Naive "\n\n".join(top-4) vs utils.context.pack_context: prompt tokens and prefill time.
+# The pages retrieve 4 chunks and the budget is only a ceiling, so packing can
+# only make the context smaller (dedupe/merge) or cut it to fit next to history.
+#
+#   python -m benchmarks.bench_context
+#   python -m benchmarks.bench_context --file spec.txt
+#   python -m benchmarks.bench_context --base-url http://localhost:11434 --model phi3:3.8b
+#
+# The text is split like the document pages (tiktoken, 600/100) and queried
+# with a sentence from a random chunk through BM25, so the neighbouring chunk
+# that shares the overlap usually comes back too. With --base-url each context
+# is sent to Ollama's /api/generate with num_predict=1 and the reported
+# prompt_eval_duration is the prefill time.
+import argparse
+import random
+import statistics
+
+import requests
+from langchain.schema import Document
+from langchain.text_splitter import CharacterTextSplitter
+
+from utils.context import context_budget, context_limit, count_tokens, pack_context
+from utils.hybrid import KeywordIndex
+
+WORDS = (
+    "the controller resets bus after timeout register holds value clock divider "
+    "selects frequency interrupt fires when buffer fills firmware reads status "
+    "power domain enters sleep sensor reports temperature driver polls channel"
+).split()
+
+
+def synthetic_text(paragraphs, seed):
+    rng = random.Random(seed)
+    lines = []
+    for i in range(paragraphs):
+        for j in range(rng.randint(4, 9)):
+            words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20)))
+            lines.append(f"{i}.{j} {words.capitalize()}.")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def prefill_ms(base_url, model, prompt):
+    response = requests.post(
+        f"{base_url}/api/generate",
+        json={
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "options": {"num_predict": 1, "num_ctx": context_limit(model)},
+        },
+        timeout=600,
+    )
+    response.raise_for_status()
+    return response.json()["prompt_eval_duration"] / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file")
+    parser.add_argument("--paragraphs", type=int, default=400)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--base-url")
+    parser.add_argument("--model", default="phi3:3.8b")
+    parser.add_argument("--history", type=int, default=0, help="tokens already used by chat history")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = synthetic_text(args.paragraphs, args.seed)
+    splitter = CharacterTextSplitter.from_tiktoken_encoder(separator="\n", chunk_size=600, chunk_overlap=100)
+    docs = splitter.split_documents([Document(page_content=text, metadata={"source": "bench"})])
+    # 흔한 단어도 점수에 넣어서 항상 4개를 돌려받도록 (dense retriever처럼)
+    keywords = KeywordIndex(max_df=1.0)
+    keywords.add([str(i) for i in range(len(docs))], [doc.page_content for doc in docs])
+    # ChatPage.format_docs와 같이 history는 budget의 절반까지만 뺌
+    budget = context_budget(args.model)
+    budget -= min(args.history, budget // 2)
+    print(f"{len(docs)} chunks, model {args.model}, budget {budget} tokens")
+
+    rng = random.Random(args.seed + 1)
+    rows = {"naive top-4": [], "packed top-4": []}
+    for _ in range(args.queries):
+        sentences = docs[rng.randrange(len(docs))].page_content.split("\n")
+        query = rng.choice([s for s in sentences if s.strip()] or sentences)
+        ranked = [docs[int(id_)] for id_, _ in keywords.search(query, 4)]
+        rows["naive top-4"].append("\n\n".join(doc.page_content for doc in ranked))
+        rows["packed top-4"].append(pack_context(ranked, budget))
+
+    # overflow: 컨텍스트가 예산을 넘어서 (Ollama라면) 프롬프트 앞부분이 잘리는 경우
+    print(f"{'context':<16}{'tokens p50':>12}{'tokens max':>12}{'overflow':>10}{'prefill ms':>12}")
+    for name, contexts in rows.items():
+        tokens = [count_tokens(context) for context in contexts]
+        overflow = sum(count > budget for count in tokens)
+        prefill = "-"
+        if args.base_url:
+            prefill = f"{statistics.median(prefill_ms(args.base_url, args.model, c) for c in contexts):.0f}"
+        print(f"{name:<16}{statistics.median(tokens):>12.0f}{max(tokens):>12}{overflow:>10}{prefill:>12}")
+
+
+if __name__ == "__main__":
+    main()
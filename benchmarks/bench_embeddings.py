@@ -0,0 +1,54 @@
+# Serial OllamaEmbeddings vs utils.embeddings.BatchedOllamaEmbeddings.
+#
+#   python -m benchmarks.bench_embeddings --chunks 500
+#   python -m benchmarks.bench_embeddings --base-url http://localhost:11434 --model llama3.1:latest
+#
+# Without --base-url a local stub server (benchmarks/stub_ollama.py) is used.
+import argparse
+import time
+
+from langchain.embeddings.ollama import OllamaEmbeddings
+
+from benchmarks.stub_ollama import serve
+from utils.embeddings import BatchedOllamaEmbeddings
+
+
+def fake_chunks(count):
+    return [f"chunk {i}: the controller resets the bus after {i} ms" for i in range(count)]
+
+
+def measure(name, embeddings, texts):
+    started = time.perf_counter()
+    vectors = embeddings.embed_documents(texts)
+    elapsed = time.perf_counter() - started
+    assert len(vectors) == len(texts)
+    print(f"{name:<32}{elapsed:>10.2f}s{len(texts) / elapsed:>14.1f} chunks/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--model", default="llama3.1:latest")
+    parser.add_argument("--base-url")
+    parser.add_argument("--parallel", type=int, default=2, help="stub server parallelism")
+    args = parser.parse_args()
+
+    base_url = args.base_url
+    if base_url is None:
+        _, base_url = serve(parallel=args.parallel)
+    texts = fake_chunks(args.chunks)
+
+    print(f"{'embedder':<32}{'time':>11}{'throughput':>22}")
+    measure("OllamaEmbeddings (serial)", OllamaEmbeddings(model=args.model, base_url=base_url), texts)
+    for batch_size, workers in [(1, 4), (16, 1), (32, 2), (64, 4)]:
+        measure(
+            f"batched(size={batch_size}, workers={workers})",
+            BatchedOllamaEmbeddings(
+                model=args.model, base_url=base_url, batch_size=batch_size, max_workers=workers
+            ),
+            texts,
+        )
+
+
+if __name__ == "__main__":
+    main()
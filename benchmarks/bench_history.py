@@ -0,0 +1,76 @@
+# Per-rerun cost of painting chat history: whole session list vs utils.history_store.
+#
+#   python -m benchmarks.bench_history
+#   python -m benchmarks.bench_history --lengths 100 1000 10000 --words 300
+#
+# Fills a temporary history database with threads of different lengths and
+# compares what one rerun has to send to the browser (messages and bytes of
+# markdown) plus the script time to get there. "session list" is the old
+# paint_history over st.session_state; "paged" is ChatHistory after a
+# reconnect (loading the latest page from SQLite) and after one "load older".
+# Streamlit runs bare here, so the browser's markdown rendering, which grows
+# with the bytes sent, is not included in the times.
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import streamlit as st
+
+from utils.history_store import ChatHistory, HistoryStore
+
+WORDS = "the a model cache token memory query index page answer code register latency user thread".split()
+
+
+def text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def paint(messages):
+    for message in messages:
+        with st.chat_message(message["role"]):
+            st.markdown(message["message"])
+    return len(messages), sum(len(message["message"].encode("utf-8")) for message in messages)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lengths", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--words", type=int, default=200, help="words per answer")
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(os.path.join(tmp, "history.db"))
+        print(f"{'messages':>8}  {'mode':<14}{'painted':>8}{'KB sent':>9}{'ms':>9}")
+        for length in args.lengths:
+            page = f"bench_{length}"
+            messages = []
+            for i in range(length):
+                role = "human" if i % 2 == 0 else "ai"
+                message = text(rng, 20 if role == "human" else args.words)
+                store.append("bench", page, role, message)
+                messages.append({"role": role, "message": message})
+
+            started = time.perf_counter()
+            painted, sent = paint(messages)
+            rows = [("session list", painted, sent, time.perf_counter() - started)]
+
+            started = time.perf_counter()
+            history = ChatHistory(store, "bench", page, page_size=args.page_size)
+            painted, sent = paint(history.messages)
+            rows.append(("paged", painted, sent, time.perf_counter() - started))
+
+            started = time.perf_counter()
+            history.load_older()
+            painted, sent = paint(history.messages)
+            rows.append(("+ load older", painted, sent, time.perf_counter() - started))
+
+            for mode, painted, sent, seconds in rows:
+                print(f"{length:>8}  {mode:<14}{painted:>8}{sent / 1024:>9.0f}{seconds * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
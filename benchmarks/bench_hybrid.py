@@ -0,0 +1,102 @@
+# Keyword (BM25) lookup latency and exact-identifier recall: dense vs hybrid.
+#
+#   python -m benchmarks.bench_hybrid
+#   python -m benchmarks.bench_hybrid --chunks 50000
+#   python -m benchmarks.bench_hybrid --base-url http://localhost:11434 --model llama3:latest
+#
+# The corpus is synthetic: filler sentences, each chunk mentioning one part
+# number (e.g. "PN-48213-KX") and one snake_case function name. A query asks
+# about one of those identifiers and the chunk that contains it is the only
+# relevant one. Without --base-url only the keyword side is measured.
+import argparse
+import random
+import statistics
+import time
+
+from langchain.vectorstores.faiss import FAISS
+
+from utils.embeddings import BatchedOllamaEmbeddings
+from utils.hybrid import KeywordIndex, hybrid_search
+
+WORDS = (
+    "voltage current register timing clock signal buffer memory controller bus "
+    "interrupt latency power thermal sensor firmware driver reset mode channel "
+    "전압 전류 레지스터 클럭 신호 버퍼 메모리 인터럽트 지연 전력 센서 드라이버"
+).split()
+
+
+def synthetic(count, seed):
+    rng = random.Random(seed)
+    texts, identifiers = [], []
+    for i in range(count):
+        part = f"PN-{rng.randint(10000, 99999)}-{rng.choice('ABCDEFGHJK')}{rng.choice('XYZ')}"
+        function = f"{rng.choice(WORDS[:20])}_{rng.choice(WORDS[:20])}_{i}"
+        filler = " ".join(rng.choice(WORDS) for _ in range(80))
+        texts.append(f"{filler} The {part} uses {function}() during start-up. {filler[:200]}")
+        identifiers.append(rng.choice([part, function]))
+    return texts, identifiers
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), sorted(samples)[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--base-url")
+    parser.add_argument("--model", default="llama3:latest")
+    args = parser.parse_args()
+
+    texts, identifiers = synthetic(args.chunks, args.seed)
+    ids = [f"doc:{i}" for i in range(len(texts))]
+    started = time.perf_counter()
+    keywords = KeywordIndex()
+    keywords.add(ids, texts)
+    print(f"{len(texts)} chunks, {len(keywords.postings)} terms, indexed in {time.perf_counter() - started:.2f}s")
+
+    rng = random.Random(args.seed + 1)
+    targets = rng.sample(range(len(texts)), args.queries)
+    queries = [f"What does {identifiers[i]} do?" for i in targets]
+
+    lookups = iter(queries * 5)
+    p50, p95 = timed(lambda: keywords.search(next(lookups), 20), len(queries) * 5)
+    print(f"keyword lookup      p50 {p50:.3f} ms   p95 {p95:.3f} ms")
+
+    def recall(results):
+        hits = sum(f"doc:{target}" in found for target, found in zip(targets, results))
+        return hits / len(targets)
+
+    bm25 = [[id_ for id_, _ in keywords.search(query, args.k)] for query in queries]
+    print(f"{'retriever':<20}{'hit@' + str(args.k):>8}")
+    print(f"{'bm25':<20}{recall(bm25):>8.3f}")
+    if not args.base_url:
+        return
+
+    embeddings = BatchedOllamaEmbeddings(model=args.model, base_url=args.base_url)
+    vectors = embeddings.embed_documents(texts)
+    vectorstore = FAISS.from_embeddings(list(zip(texts, vectors)), embeddings, ids=ids)
+    query_vectors = [embeddings.embed_query(query) for query in queries]
+    dense = [
+        [doc.page_content for doc in vectorstore.similarity_search_by_vector(vector, k=args.k)]
+        for vector in query_vectors
+    ]
+    hybrid = [
+        [doc.page_content for doc in hybrid_search(vectorstore, keywords, query, vector, k=args.k)]
+        for query, vector in zip(queries, query_vectors)
+    ]
+    by_text = {text: id_ for id_, text in zip(ids, texts)}
+    print(f"{'dense':<20}{recall([[by_text[t] for t in found] for found in dense]):>8.3f}")
+    print(f"{'hybrid (rrf)':<20}{recall([[by_text[t] for t in found] for found in hybrid]):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
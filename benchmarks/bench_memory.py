@@ -0,0 +1,128 @@
+# History tokens per prompt as a session grows: full history vs token buffer
+# vs summary tier vs summary + recalled turns, and how often an old fact
+# is still in the history when it is asked about again.
+#
+#   python -m benchmarks.bench_memory --stub
+#   python -m benchmarks.bench_memory --turns 200 --limit 1000
+#
+# Replays a synthetic chat through utils.memory.SessionMemory. The summary
+# tier uses the local Ollama (phi3:3.8b) at localhost:11434 in the background;
+# --stub starts benchmarks.stub_ollama on that port instead. Every 5th turn
+# states a fact (a part number and its register); from turn 30 every 5th
+# question asks about an earlier one, and "fact kept" counts the questions
+# whose history still contains that part number verbatim (not via the
+# summary). Recall embeds with hashed word counts unless --embed-model
+# names an Ollama embedding model. Tokens are counted with
+# utils.context.count_tokens. "pending" is how many pruned turns were still
+# waiting for the summary when the next question was asked.
+import argparse
+import hashlib
+import random
+import re
+import statistics
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from benchmarks.stub_ollama import serve
+from utils.clients import get_ollama_embeddings
+from utils.context import count_tokens
+from utils.memory import SessionMemory
+
+WORDS = (
+    "register clock buffer interrupt firmware driver timeout reset voltage sensor "
+    "channel controller memory bus latency power thermal signal mode status"
+).split()
+
+
+class TokenCounter:
+    # SessionMemory은 llm을 토큰 세는 데만 씀
+    def get_num_tokens_from_messages(self, messages):
+        return sum(count_tokens(message.content) for message in messages)
+
+
+class HashedWordEmbeddings(Embeddings):
+    # 단어 해시 bag-of-words: 같은 부품 번호를 말하면 가까워지는 정도의 embedding
+    def __init__(self, dimension=512):
+        self.dimension = dimension
+
+    def _vector(self, text):
+        vector = np.zeros(self.dimension, dtype="float32")
+        for word in re.findall(r"[\w-]+", text.lower()):
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dimension] += 1
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def history_tokens(messages):
+    return sum(count_tokens(message.content) for message in messages)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=2000, help="max_token_limit of the recent-turn buffer")
+    parser.add_argument("--think", type=float, default=0.5, help="seconds between an answer and the next question")
+    parser.add_argument("--stub", action="store_true")
+    parser.add_argument("--embed-model")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.stub:
+        serve(port=11434, request_latency=0.05, token_latency=0.005, swap_latency=0)
+
+    rng = random.Random(args.seed)
+    chat_summary = []
+    buffer = SessionMemory(TokenCounter(), max_token_limit=args.limit)
+    tiered = SessionMemory(TokenCounter(), max_token_limit=args.limit, summarizer=("ollama", "phi3:3.8b"))
+    embeddings = get_ollama_embeddings(args.embed_model) if args.embed_model else HashedWordEmbeddings()
+    recalling = SessionMemory(
+        TokenCounter(), max_token_limit=args.limit, summarizer=("ollama", "phi3:3.8b"), recall=embeddings
+    )
+    memories = {"token buffer": buffer, "summary tier": tiered, "summary + recall": recalling}
+    rows = {"full history": [], **{name: [] for name in memories}}
+    kept = {name: 0 for name in memories}
+    facts, probes, pending = [], 0, []
+    for turn in range(args.turns):
+        question = " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 40))) + "?"
+        probe = None
+        if turn % 5 == 0:
+            part, register = f"PN-{rng.randint(10000, 99999)}", f"REG_{rng.randint(0, 255):02X}"
+            facts.append(part)
+            question = f"Note that part {part} is configured through register {register}. {question}"
+        elif turn >= 30 and turn % 5 == 1:
+            probe = rng.choice(facts[:-2])
+            question = f"Which register configures part {probe} again?"
+            probes += 1
+        rows["full history"].append(sum(count_tokens(c["question"]) + count_tokens(c["answer"]) for c in chat_summary))
+        for name, memory in memories.items():
+            history = memory.load_memory_variables({"question": question})["history"]
+            rows[name].append(history_tokens(history))
+            if probe is not None and any(probe in message.content for message in history[1 if memory.summary else 0 :]):
+                kept[name] += 1
+        pending.append(len(tiered.evicted) // 2)
+        answer = " ".join(rng.choice(WORDS) for _ in range(rng.randint(80, 300)))
+        chat_summary.append({"question": question, "answer": answer})
+        for memory in memories.values():
+            memory.sync(chat_summary)
+        time.sleep(args.think)
+
+    marks = [m for m in (10, 50, 100, 200, 500) if m <= args.turns]
+    print(f"{'history':<18}" + "".join(f"{'turn ' + str(m):>11}" for m in marks) + f"{'mean':>9}{'fact kept':>11}")
+    for name, tokens in rows.items():
+        fact = f"{kept[name]}/{probes}" if name in kept else "all"
+        print(
+            f"{name:<18}" + "".join(f"{tokens[m - 1]:>11}" for m in marks)
+            + f"{statistics.mean(tokens):>9.0f}{fact:>11}"
+        )
+    print(f"summary {count_tokens(tiered.summary)} tokens, pruned turns still pending: max {max(pending)}")
+
+
+if __name__ == "__main__":
+    main()
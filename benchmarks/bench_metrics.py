@@ -0,0 +1,95 @@
+# Overhead of utils.metrics.MetricsCallback on a document-page shaped chain.
+#
+#   python -m benchmarks.bench_metrics
+#   python -m benchmarks.bench_metrics --calls 500 --tokens 200
+#
+# retrieval -> format_docs -> prompt -> ChatOllama against the stub server
+# (benchmarks.stub_ollama) with no token delay. Every page call already has
+# a token collector attached (utils.async_runner), so the difference between
+# the last two rows is the metrics callback's own cost. Records go to a
+# temporary store and one of them is printed so the stage names can be checked.
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+
+from langchain.callbacks.base import AsyncCallbackHandler
+from langchain.prompts import ChatPromptTemplate
+from langchain.schema import Document
+from langchain.schema.runnable import RunnableLambda, RunnablePassthrough
+from langchain_community.chat_models import ChatOllama
+
+from benchmarks.stub_ollama import serve
+from utils.metrics import MetricsCallback, MetricsStore
+
+
+class TokenCounter(AsyncCallbackHandler):
+    tokens = 0
+
+    async def on_llm_new_token(self, token, **kwargs):
+        self.tokens += 1
+
+
+def format_docs(docs):
+    return "\n\n".join(doc.page_content for doc in docs)
+
+
+def load_memory(_):
+    return []
+
+
+async def run(chain, calls, collector=False, store=None):
+    samples = []
+    for _ in range(calls):
+        callbacks = [TokenCounter()] if collector else []
+        if store is not None:
+            callbacks.append(MetricsCallback(store, "bench"))
+        started = time.perf_counter()
+        await chain.ainvoke("What resets the bus?", config={"callbacks": callbacks})
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--tokens", type=int, default=100)
+    args = parser.parse_args()
+
+    _, base_url = serve(request_latency=0, token_latency=0)
+    docs = [Document(page_content=f"chunk {i}: the controller resets the bus after a timeout") for i in range(12)]
+    retriever = RunnableLambda(lambda query: docs).with_config(run_name="retrieval")
+    prompt = ChatPromptTemplate.from_messages(
+        [("system", "Answer from the context.\n{context}"), ("human", "{question}")]
+    )
+    llm = ChatOllama(model="phi3:3.8b", base_url=base_url, num_predict=args.tokens)
+    chain = (
+        {
+            "context": retriever | RunnableLambda(format_docs),
+            "history": RunnableLambda(load_memory),
+            "question": RunnablePassthrough(),
+        }
+        | prompt
+        | llm
+    )
+
+    with tempfile.TemporaryDirectory() as path:
+        store = MetricsStore(path)
+        asyncio.run(run(chain, 10))
+        rows = [
+            ("none", asyncio.run(run(chain, args.calls))),
+            ("tokens", asyncio.run(run(chain, args.calls, collector=True))),
+            ("tokens+metrics", asyncio.run(run(chain, args.calls, collector=True, store=store))),
+        ]
+        records = store.load()
+        print(f"{'callbacks':<16}{'p50 ms':>10}")
+        for name, p50 in rows:
+            print(f"{name:<16}{p50:>10.2f}")
+        print(f"{len(records)} records, last:")
+        print(json.dumps(records[-1], indent=1))
+
+
+if __name__ == "__main__":
+    main()
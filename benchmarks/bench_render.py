@@ -0,0 +1,75 @@
+# Cost of painting chat history through utils.render: first render vs cached.
+#
+#   python -m benchmarks.bench_render
+#   python -m benchmarks.bench_render --messages 200 --code-blocks 3
+#
+# Builds a history of answers shaped like the code pages' (paragraphs, a
+# list, fenced Python blocks) and paints it the way paint_history does on
+# every rerun. "first paint" parses and highlights every message; later
+# reruns only hash the text and look the HTML up. The "st.markdown" row is
+# the old path's Python side only: with it the browser re-parses the whole
+# thread on every rerun, which is not measured here.
+import argparse
+import random
+import time
+
+import streamlit as st
+
+from utils.render import MessageRenderer
+
+WORDS = "the a model cache token memory query index page answer code register latency user thread".split()
+CODE = '''def lookup(cache, key, default=None):
+    """Return the cached value for key."""
+    entry = cache.get(key)
+    if entry is None:
+        return default
+    return entry["value"]
+'''
+
+
+def answer(rng, words, code_blocks):
+    parts = []
+    for i in range(code_blocks + 1):
+        parts.append(" ".join(rng.choice(WORDS) for _ in range(words // (code_blocks + 1))))
+        parts.append("- **first** item\n- second item with `inline` code")
+        if i < code_blocks:
+            parts.append(f"```python\n{CODE}# {rng.random()}\n```")
+    return "\n\n".join(parts)
+
+
+def paint(messages, render):
+    started = time.perf_counter()
+    for message in messages:
+        with st.chat_message("ai"):
+            render(message)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--words", type=int, default=200)
+    parser.add_argument("--code-blocks", type=int, default=2)
+    parser.add_argument("--reruns", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    messages = [answer(rng, args.words, args.code_blocks) for _ in range(args.messages)]
+    renderer = MessageRenderer()
+
+    rows = [("st.markdown", paint(messages, st.markdown))]
+    rows.append(("first paint", paint(messages, lambda message: st.html(renderer.render(message, code=True)))))
+    reruns = [
+        paint(messages, lambda message: st.html(renderer.render(message, code=True))) for _ in range(args.reruns)
+    ]
+    rows.append(("cached rerun", min(reruns)))
+
+    print(f"{args.messages} messages, {args.code_blocks} code blocks each")
+    print(f"{'paint':<14}{'ms':>9}{'ms/message':>12}")
+    for name, seconds in rows:
+        print(f"{name:<14}{seconds * 1000:>9.1f}{seconds * 1000 / args.messages:>12.3f}")
+    print(f"cache hits {renderer.hits}, misses {renderer.misses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# Requests for several local models: straight to Ollama vs through utils.scheduler.
+#
+#   python -m benchmarks.bench_scheduler
+#   python -m benchmarks.bench_scheduler --requests 120 --rate 6 --swap 1.5
+#   python -m benchmarks.bench_scheduler --base-url http://localhost:11434
+#
+# Without --base-url a stub server (benchmarks.stub_ollama) plays Ollama with
+# one resident model, so a request for another model waits for the running
+# ones and then pays --swap seconds to load it. Requests arrive as a Poisson
+# process and pick one of the page models at random; latency is measured from
+# arrival to the last token.
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from langchain_community.chat_models import ChatOllama
+
+from benchmarks.stub_ollama import serve
+from utils.scheduler import OllamaScheduler
+
+MODELS = ["llama3.1:latest", "codegemma", "phi3:3.8b"]
+
+
+async def run(base_url, arrivals, tokens, scheduler=None):
+    chats = {model: ChatOllama(model=model, base_url=base_url, num_predict=tokens) for model in MODELS}
+    started = time.perf_counter()
+
+    async def one(delay, model):
+        await asyncio.sleep(delay)
+        arrived = time.perf_counter()
+        if scheduler is None:
+            await chats[model].ainvoke("Hello")
+        else:
+            async with scheduler.slot(model):
+                await chats[model].ainvoke("Hello")
+        return time.perf_counter() - arrived
+
+    latencies = await asyncio.gather(*(one(delay, model) for delay, model in arrivals))
+    return sorted(latencies), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--rate", type=float, default=4, help="arrivals per second")
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--parallel", type=int, default=2, help="OLLAMA_NUM_PARALLEL of the server")
+    parser.add_argument("--swap", type=float, default=1.0, help="stub model load time in seconds")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--base-url")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    arrivals, now = [], 0.0
+    for _ in range(args.requests):
+        now += rng.expovariate(args.rate)
+        arrivals.append((now, rng.choice(MODELS)))
+
+    cases = [
+        ("direct", lambda: None),
+        (
+            f"scheduler({args.parallel}/{args.max_batch})",
+            lambda: OllamaScheduler(max_concurrent=args.parallel, max_batch=args.max_batch),
+        ),
+    ]
+    print(f"{'client':<20}{'p50 s':>8}{'p95 s':>8}{'max s':>8}{'total s':>9}{'swaps':>7}")
+    for name, make_scheduler in cases:
+        server = None
+        base_url = args.base_url
+        if base_url is None:
+            server, base_url = serve(parallel=args.parallel, token_latency=0.02, swap_latency=args.swap)
+        latencies, total = asyncio.run(run(base_url, arrivals, args.tokens, make_scheduler()))
+        swaps = server.stats["swaps"] if server else "-"
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(
+            f"{name:<20}{statistics.median(latencies):>8.2f}{p95:>8.2f}"
+            f"{latencies[-1]:>8.2f}{total:>9.2f}{swaps:>7}"
+        )
+        if server:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# Compares per-token markdown updates with utils.streaming.StreamRenderer.
+#
+#   python -m benchmarks.bench_streaming --tokens 2000 --rate 80
+#
+# A fake placeholder parses every update with markdown-it (what the frontend
+# has to do) and counts the bytes that would go over the websocket.
+import argparse
+import time
+
+from markdown_it import MarkdownIt
+
+from utils.streaming import StreamRenderer
+
+md = MarkdownIt()
+
+
+class FakePlaceholder:
+    def __init__(self, started):
+        self.started = started
+        self.first_update = None
+        self.updates = 0
+        self.bytes_sent = 0
+        self.render_time = 0.0
+
+    def markdown(self, text):
+        begin = time.perf_counter()
+        if self.first_update is None:
+            self.first_update = begin - self.started
+        md.render(text)
+        self.updates += 1
+        self.bytes_sent += len(text.encode("utf-8"))
+        self.render_time += time.perf_counter() - begin
+
+
+class NaiveRenderer:
+    def __init__(self, placeholder):
+        self.placeholder = placeholder
+        self.message = ""
+
+    def write(self, token):
+        self.message += token
+        self.placeholder.markdown(self.message)
+
+    def close(self):
+        return self.message
+
+
+def fake_tokens(count):
+    words = ["The", " CPU", " fetches", " an", " instruction", ",", " decodes",
+             " it", " and", " executes", " it", ".\n\n", "```python\n",
+             "x = 1\n", "```\n", " - item", "\n"]
+    for i in range(count):
+        yield words[i % len(words)]
+
+
+def run(make_renderer, tokens, rate):
+    started = time.perf_counter()
+    placeholder = FakePlaceholder(started)
+    renderer = make_renderer(placeholder)
+    delay = 1.0 / rate if rate else 0
+    for token in fake_tokens(tokens):
+        if delay:
+            time.sleep(delay)
+        renderer.write(token)
+    renderer.close()
+    total = time.perf_counter() - started
+    return placeholder, total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=0, help="tokens/s, 0 = as fast as possible")
+    parser.add_argument("--interval", type=float, default=0.05)
+    parser.add_argument("--max-tokens", type=int, default=64)
+    args = parser.parse_args()
+
+    cases = [
+        ("per-token", NaiveRenderer),
+        (
+            f"throttled({args.interval * 1000:.0f}ms/{args.max_tokens})",
+            lambda p: StreamRenderer(p, interval=args.interval, max_tokens=args.max_tokens),
+        ),
+    ]
+    print(f"{'renderer':<24}{'ttft ms':>10}{'render ms':>12}{'total ms':>12}{'updates':>10}{'KiB sent':>12}")
+    for name, make_renderer in cases:
+        placeholder, total = run(make_renderer, args.tokens, args.rate)
+        print(
+            f"{name:<24}{placeholder.first_update * 1000:>10.2f}"
+            f"{placeholder.render_time * 1000:>12.1f}{total * 1000:>12.1f}"
+            f"{placeholder.updates:>10}{placeholder.bytes_sent / 1024:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
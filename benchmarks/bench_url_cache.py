@@ -0,0 +1,128 @@
+# utils.url_cache.fetch_url against a local server that speaks ETag / 304.
+#
+#   python -m benchmarks.bench_url_cache
+#   python -m benchmarks.bench_url_cache --size 20 --bandwidth 5
+#
+# The server (http.server on 127.0.0.1) serves one --size MB document with an
+# ETag and Last-Modified, answers a matching If-None-Match with 304, and
+# sends the body at --bandwidth MB/s. Each row is one fetch_url call, with
+# the status the server sent (or "-" when no request was made) and the body
+# bytes that crossed the wire:
+#   cold          - first fetch, full download
+#   fresh         - within max_age, served from the cache without a request
+#   revalidate    - past max_age, 304 Not Modified, same file
+#   changed       - the document changed, new ETag, downloaded again
+#   offline       - server stopped, the cached copy is returned
+# "no cache" is a plain requests.get of the same document for comparison.
+# The cache lives in a temporary directory; the run fails if any path
+# behaves differently.
+import argparse
+import os
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from utils import url_cache
+
+
+class DocumentHandler(BaseHTTPRequestHandler):
+    document = {"body": b"", "etag": "", "modified": ""}
+    bandwidth = 10.0
+    log = []
+
+    def do_GET(self):
+        # 클라이언트는 마지막 바이트를 받자마자 돌아가므로 보내기 전에 기록
+        document = self.document
+        if self.headers.get("If-None-Match") == document["etag"]:
+            self.log.append((304, 0))
+            self.send_response(304)
+            self.send_header("ETag", document["etag"])
+            self.end_headers()
+            return
+        body = document["body"]
+        self.log.append((200, len(body)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", document["etag"])
+        self.send_header("Last-Modified", document["modified"])
+        self.end_headers()
+        # 대역폭 흉내: 64KB씩 나눠 보냄
+        step = 64 * 1024
+        for start in range(0, len(body), step):
+            self.wfile.write(body[start : start + step])
+            time.sleep(step / (self.bandwidth * 1024 * 1024))
+
+    def log_message(self, *args):
+        pass
+
+
+def publish(size, version):
+    body = os.urandom(size)
+    DocumentHandler.document = {
+        "body": body,
+        "etag": f'"v{version}-{len(body)}"',
+        "modified": formatdate(time.time(), usegmt=True),
+    }
+
+
+def timed(name, call):
+    DocumentHandler.log = []
+    started = time.perf_counter()
+    result = call()
+    seconds = time.perf_counter() - started
+    status = ",".join(str(code) for code, _ in DocumentHandler.log) or "-"
+    sent = sum(size for _, size in DocumentHandler.log)
+    print(f"{name:<13}{status:>7}{sent / 1024:>12.0f}{seconds * 1000:>10.1f}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=float, default=5, help="document size in MB")
+    parser.add_argument("--bandwidth", type=float, default=20, help="server send rate in MB/s")
+    args = parser.parse_args()
+
+    size = int(args.size * 1024 * 1024)
+    DocumentHandler.bandwidth = args.bandwidth
+    publish(size, 1)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DocumentHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/paper.pdf"
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # CACHE_ROOT는 상대 경로라 임시 폴더 안에 캐시가 생김
+        os.chdir(tmp)
+        try:
+            print(f"{args.size:g} MB document at {args.bandwidth:g} MB/s")
+            print(f"{'fetch':<13}{'status':>7}{'KB sent':>12}{'ms':>10}")
+            timed("no cache", lambda: requests.get(url, timeout=60).content)
+            cold = timed("cold", lambda: url_cache.fetch_url(url, "paper.pdf"))
+            fresh = timed("fresh", lambda: url_cache.fetch_url(url, "paper.pdf"))
+            assert not DocumentHandler.log and fresh["hash"] == cold["hash"]
+            revalidated = timed("revalidate", lambda: url_cache.fetch_url(url, "paper.pdf", max_age=0))
+            assert DocumentHandler.log == [(304, 0)] and revalidated["path"] == cold["path"]
+
+            publish(size, 2)
+            changed = timed("changed", lambda: url_cache.fetch_url(url, "paper.pdf", max_age=0))
+            assert DocumentHandler.log[0][0] == 200 and changed["hash"] != cold["hash"]
+            with open(changed["path"], "rb") as f:
+                assert f.read() == DocumentHandler.document["body"]
+
+            server.shutdown()
+            server.server_close()
+            offline = timed("offline", lambda: url_cache.fetch_url(url, "paper.pdf", max_age=0))
+            assert offline["hash"] == changed["hash"]
+        finally:
+            os.chdir(cwd)
+    print("304, ETag and offline paths ok")
+
+
+if __name__ == "__main__":
+    main()
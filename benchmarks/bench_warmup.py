@@ -0,0 +1,120 @@
+# Time to first token with Ollama's default keep_alive vs utils.warmup.
+#
+#   python -m benchmarks.bench_warmup
+#   python -m benchmarks.bench_warmup --requests 80 --gap 10
+#
+# One user moves between two Ollama pages, mostly staying on the same one,
+# with idle gaps between questions. The stub server (benchmarks.stub_ollama)
+# keeps one model loaded and unloads it after keep_alive, so a question pays
+# --load seconds whenever its model was swapped out or expired. Minutes are
+# compressed by --scale (0.01: Ollama's 5 minute default becomes 3 s).
+#   default    - requests only, keep_alive left at the server default
+#   keep_alive - ModelWarmer refreshes keep_alive from traffic after each answer
+#   + warm     - also warms the page's model when the page is opened,
+#                --typing seconds before the question is sent
+# The last line sends --burst questions alternating between the two models
+# --burst-gap apart through utils.async_runner.Generation and counts the swaps: the
+# keep_alive refresh after each answer must not swap a model back in while
+# the scheduler is already serving the other one.
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from langchain_community.chat_models import ChatOllama
+
+from benchmarks.stub_ollama import serve
+from utils.async_runner import Generation
+from utils.scheduler import OllamaScheduler
+from utils.warmup import ModelWarmer
+
+MODELS = ["phi3:3.8b", "llama3.1:latest"]
+
+
+async def run(base_url, visits, scale, typing, mode):
+    scheduler = OllamaScheduler()
+    warmer = ModelWarmer(
+        scheduler,
+        asyncio.get_running_loop(),
+        base_url=base_url,
+        models=MODELS,
+        window=3600 * scale,
+        min_keep_alive=300 * scale,
+        per_request=120 * scale,
+        max_keep_alive=7200 * scale,
+    )
+    chats = {model: ChatOllama(model=model, base_url=base_url, num_predict=5) for model in MODELS}
+    ttft = []
+    for gap, model in visits:
+        await asyncio.sleep(gap)
+        if mode == "+ warm":
+            await asyncio.to_thread(warmer.warm, model)
+        await asyncio.sleep(typing)
+        started = time.perf_counter()
+        async with scheduler.slot(model):
+            async for _ in chats[model].astream("Hello"):
+                ttft.append(time.perf_counter() - started)
+                break
+        if mode != "default":
+            warmer.record(model)
+            await warmer.refresh(model)
+    return sorted(ttft)
+
+
+async def burst(base_url, requests, gap):
+    # Generation.start() submits to the app's shared loop, which only exists under
+    # `streamlit run`; here every generation runs on this benchmark's loop instead
+    scheduler = OllamaScheduler()
+    warmer = ModelWarmer(scheduler, asyncio.get_running_loop(), base_url=base_url, models=MODELS)
+    chats = {model: ChatOllama(model=model, base_url=base_url, num_predict=5) for model in MODELS}
+    generations, tasks = [], []
+    for i in range(requests):
+        model = MODELS[i % 2]
+        generation = Generation(chats[model], "Hello", model=model, scheduler=scheduler, warmer=warmer)
+        generations.append(generation)
+        tasks.append(asyncio.ensure_future(generation._run()))
+        await asyncio.sleep(gap)
+    await asyncio.gather(*tasks)
+    # keep_alive refreshes still pending are part of the burst too
+    while warmer.tasks:
+        await asyncio.sleep(0.05)
+    return [generation.error for generation in generations if generation.error is not None]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--scale", type=float, default=0.01, help="seconds per simulated second")
+    parser.add_argument("--gap", type=float, default=6, help="mean idle minutes between questions")
+    parser.add_argument("--stay", type=float, default=0.8, help="chance the next question is on the same page")
+    parser.add_argument("--typing", type=float, default=1.0, help="seconds between opening a page and sending")
+    parser.add_argument("--load", type=float, default=1.0, help="stub model load time in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--burst", type=int, default=8)
+    parser.add_argument("--burst-gap", type=float, default=0.3, help="seconds between burst questions")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    visits, model = [], MODELS[0]
+    for _ in range(args.requests):
+        if rng.random() > args.stay:
+            model = MODELS[1 - MODELS.index(model)]
+        visits.append((rng.expovariate(1 / args.gap) * 60 * args.scale, model))
+
+    print(f"{'keep-alive':<14}{'ttft p50 s':>12}{'ttft p95 s':>12}{'loads':>7}")
+    for mode in ("default", "keep_alive", "+ warm"):
+        server, base_url = serve(swap_latency=args.load, keep_alive=300 * args.scale, token_latency=0.01)
+        ttft = asyncio.run(run(base_url, visits, args.scale, args.typing, mode))
+        p95 = ttft[int(len(ttft) * 0.95) - 1]
+        print(f"{mode:<14}{statistics.median(ttft):>12.2f}{p95:>12.2f}{server.stats['swaps']:>7}")
+        server.shutdown()
+
+    server, base_url = serve(swap_latency=args.load, token_latency=0.01)
+    errors = asyncio.run(burst(base_url, args.burst, args.burst_gap))
+    print(f"burst of {args.burst} alternating requests: {server.stats['swaps']} swaps, {len(errors)} errors")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# Minimal stand-in for the Ollama HTTP API used by the benchmarks.
+#
+#   python -m benchmarks.stub_ollama --port 11435
+#
+# /api/embed and /api/embeddings return deterministic vectors after a fixed
+# per-request latency plus a per-text cost, which is roughly how a local
+# Ollama behaves: request overhead dominates for short chunks.
+# /api/chat streams NDJSON tokens (prefill = request latency, then one token
+# per token_latency) and, like Ollama, stops generating when the client
+# disconnects. Only one chat model is resident at a time: requests are
+# admitted in arrival order, and a request for another model waits until the
+# running ones finish and then pays swap_latency to load it. A model is
+# unloaded once it has been idle for its keep_alive (seconds, default
+# keep_alive when the request sends none); /api/generate without a prompt
+# just loads the model and /api/ps reports what is loaded.
+# server.stats counts generated tokens, aborted requests and model loads.
+import argparse
+import contextlib
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DIMENSION = 64
+
+
+def fake_vector(text):
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return [(digest[i % len(digest)] - 128) / 128 for i in range(DIMENSION)]
+
+
+class ModelGate:
+    # OLLAMA_MAX_LOADED_MODELS=1 흉내: 도착 순서대로, 다른 모델은 돌던 요청이 끝나야 교체
+    def __init__(self, parallel, swap_latency, keep_alive, stats):
+        self.parallel = parallel
+        self.swap_latency = swap_latency
+        self.keep_alive = keep_alive
+        self.stats = stats
+        self.condition = threading.Condition()
+        self.waiting = deque()
+        self.loaded = None
+        self.expires = None
+        self.running = 0
+
+    def _expire(self):
+        if self.loaded is not None and not self.running and time.time() > self.expires:
+            self.loaded = None
+
+    def resident(self):
+        with self.condition:
+            self._expire()
+            return self.loaded, self.expires
+
+    @contextlib.contextmanager
+    def hold(self, model, keep_alive=None):
+        if keep_alive is None:
+            keep_alive = self.keep_alive
+        elif keep_alive < 0:
+            keep_alive = float("inf")
+        token = object()
+        with self.condition:
+            self._expire()
+            self.waiting.append(token)
+            self.condition.wait_for(
+                lambda: self.waiting[0] is token
+                and self.running < self.parallel
+                and (self.loaded == model or not self.running)
+            )
+            self.waiting.popleft()
+            if self.loaded != model:
+                time.sleep(self.swap_latency)
+                self.loaded = model
+                with self.stats["lock"]:
+                    self.stats["swaps"] += 1
+            self.running += 1
+            self.expires = float("inf")
+            self.condition.notify_all()
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.running -= 1
+                # Ollama처럼 마지막 요청이 끝난 시점부터 keep_alive를 셈
+                self.expires = time.time() + keep_alive
+                self.condition.notify_all()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    request_latency = 0.02
+    text_latency = 0.002
+    token_latency = 0.02
+    slots = None
+    gate = None
+    stats = None
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path == "/api/embed":
+            texts = payload["input"]
+            if isinstance(texts, str):
+                texts = [texts]
+            self._work(len(texts))
+            self._reply(200, {"model": payload["model"], "embeddings": [fake_vector(t) for t in texts]})
+        elif self.path == "/api/embeddings":
+            self._work(1)
+            self._reply(200, {"embedding": fake_vector(payload["prompt"])})
+        elif self.path == "/api/chat":
+            self._chat(payload)
+        elif self.path == "/api/generate" and not payload.get("prompt"):
+            with self.gate.hold(payload["model"], payload.get("keep_alive")):
+                pass
+            self._reply(200, {"model": payload["model"], "response": "", "done": True})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_GET(self):
+        if self.path != "/api/ps":
+            self._reply(404, {"error": "not found"})
+            return
+        loaded, expires = self.gate.resident()
+        models = []
+        if loaded is not None:
+            expires_at = datetime.now(timezone.utc) + timedelta(seconds=min(expires - time.time(), 1e9))
+            models.append({"name": loaded, "model": loaded, "expires_at": expires_at.isoformat()})
+        self._reply(200, {"models": models})
+
+    def _chat(self, payload):
+        count = payload.get("options", {}).get("num_predict") or 50
+        if count < 0:
+            count = 50
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        with self.gate.hold(payload["model"], payload.get("keep_alive")):
+            time.sleep(self.request_latency)
+            try:
+                for i in range(count):
+                    time.sleep(self.token_latency)
+                    line = {"model": payload["model"], "message": {"role": "assistant", "content": f"tok{i} "}, "done": False}
+                    self.wfile.write(json.dumps(line).encode("utf-8") + b"\n")
+                    self.wfile.flush()
+                    with self.stats["lock"]:
+                        self.stats["generated"] += 1
+                done = {"model": payload["model"], "message": {"role": "assistant", "content": ""}, "done": True, "eval_count": count}
+                self.wfile.write(json.dumps(done).encode("utf-8") + b"\n")
+            except (BrokenPipeError, ConnectionResetError):
+                with self.stats["lock"]:
+                    self.stats["aborted"] += 1
+
+    def _work(self, texts):
+        # Ollama only runs OLLAMA_NUM_PARALLEL requests at a time
+        with self.slots:
+            time.sleep(self.request_latency + self.text_latency * texts)
+
+
+def serve(port=0, request_latency=0.02, text_latency=0.002, parallel=1, token_latency=0.02, swap_latency=0.5, keep_alive=300):
+    stats = {"lock": threading.Lock(), "generated": 0, "aborted": 0, "swaps": 0}
+    handler = type(
+        "Handler",
+        (StubHandler,),
+        {
+            "request_latency": request_latency,
+            "text_latency": text_latency,
+            "token_latency": token_latency,
+            "slots": threading.Semaphore(parallel),
+            "gate": ModelGate(parallel, swap_latency, keep_alive, stats),
+            "stats": stats,
+        },
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.stats = stats
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--parallel", type=int, default=1)
+    args = parser.parse_args()
+    server, url = serve(args.port, parallel=args.parallel)
+    print(f"stub ollama listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
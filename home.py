@@ -3,6 +3,8 @@ import streamlit_authenticator as stauth
 import yaml
 from yaml.loader import SafeLoader
 
+from utils.warmup import get_warmer
+
 # secret_key = secrets.token_hex(16)
 # print(secret_key)
 
@@ -11,6 +13,9 @@ st.set_page_config(
     page_icon="💀",
 )
 
+# 프로세스 시작 후 첫 접속 때 한 번: 자주 쓰는 Ollama 모델을 미리 올려둠
+get_warmer().start()
+
 with open("./config.ymal") as file:
     config = yaml.load(file, Loader=SafeLoader)
 
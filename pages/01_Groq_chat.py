@@ -1,34 +1,11 @@
 import streamlit as st
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.schema.runnable import RunnablePassthrough
-from langchain.callbacks.base import BaseCallbackHandler
-from langchain.memory import ConversationTokenBufferMemory
-from langchain_groq import ChatGroq
+from utils.chat_engine import ChatPage, chat_prompt, require_login
 
 st.set_page_config(
     page_title="Groq",
     page_icon="📃",
 )
 
-callback = False
-
-
-class ChatCallbackHandler(BaseCallbackHandler):
-    message = ""
-
-    def on_llm_start(self, *args, **kwargs):
-        if callback:
-            self.message_box = st.empty()
-
-    def on_llm_end(self, *args, **kwargs):
-        if callback:
-            save_messages(self.message, "ai")
-
-    def on_llm_new_token(self, token, *args, **kwargs):
-        if callback:
-            self.message += token
-            self.message_box.markdown(self.message)
-
 options = ['llama-3.1-405b-reasoning', 
            'llama-3.1-70b-versatile', 
            'llama3-groq-70b-8192-tool-use-preview', 
@@ -82,101 +59,17 @@ with st.sidebar:
         # When answering, it's important to remember that your goal is to make the information as accessible as possible. 
         # Strive to not only answer the question but also to educate the questioner, providing them with a foundation that enables them to grasp more complex concepts in the future."""
         )
-    
-if "groq_messages" not in st.session_state:
-    st.session_state["groq_messages"] = []
-
-llm = ChatGroq(
-    temperature=0.1,
-    model_name=selected_option,
-    streaming=True,
-    callbacks=[ChatCallbackHandler()],
-)
-
-memory = ConversationTokenBufferMemory(
-    llm=llm,
-    max_token_limit=1000,
-    return_messages=True,
-)
-
-if "groq_chat_summary" not in st.session_state:
-    st.session_state["groq_chat_summary"] = []
-else:
-    callback = False
-    for chat_list in st.session_state["groq_chat_summary"]:
-        memory.save_context(
-            {"input": chat_list["question"]},
-            {"output": chat_list["answer"]},
-        )
-
-
-def save_messages(message, role):
-    st.session_state["groq_messages"].append(
-        {
-            "message": message,
-            "role": role,
-        }
-    )
-
 
-def send_message(message, role, save=True):
-    with st.chat_message(role):
-        st.markdown(message)
-    if save:
-        save_messages(message, role)
-
-
-def paint_history():
-    for message in st.session_state["groq_messages"]:
-        send_message(message["message"], message["role"], save=False)
-
-prompt = ChatPromptTemplate.from_messages(
-    [
-        (
-            "system",
-            f"""
-            {prompt_text}
-            """,
-        ),
-        MessagesPlaceholder(variable_name="history"),
-        ("human", "{question}"),
-    ]
+page = ChatPage(
+    "groq",
+    "groq",
+    selected_option,
+    memory={"max_token_limit": 1000, "summarizer": ("groq", "llama3-8b-8192"), "recall": True},
 )
 
-
-def load_memory(_):
-    return memory.load_memory_variables({})["history"]
-
-
-def save_context(question, result):
-    st.session_state["groq_chat_summary"].append(
-        {
-            "question": question,
-            "answer": result,
-        }
-    )
-
-
-def invoke_chain(question):
-    result = chain.invoke(
-        {"question": question},
-    )
-    save_context(message, result.content)
-
-
 st.title("Groq-Llama3 Chatbot")
 
-st.markdown("""
-    <style>
-    .big-font {
-        font-size:30px !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-
-if "authentication_status" not in st.session_state:
-    st.markdown("<p class='big-font'>You need to log in from the 'Home' page in the left sidebar.</p>", unsafe_allow_html=True)
-else:
+if require_login():
     st.markdown(
         """
         Welcome!
@@ -185,19 +78,4 @@ else:
         
         """
     )
-
-    send_message("I'm ready! Ask away!", "ai", save=False)
-    paint_history()
-
-    authentication_status = st.session_state["authentication_status"]
-    if authentication_status:
-        message = st.chat_input("Ask anything about something...")
-        if message:
-            send_message(message, "human")
-            chain = RunnablePassthrough.assign(history=load_memory) | prompt | llm
-
-            with st.chat_message("ai"):
-                callback = True
-                invoke_chain(message)
-    else:
-        st.markdown("<p class='big-font'>You need to log in from the 'Home' page in the left sidebar.</p>", unsafe_allow_html=True)
+    page.chat(chat_prompt(prompt_text))
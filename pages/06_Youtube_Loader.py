@@ -1,17 +1,14 @@
 import streamlit as st
 from langchain_openai import ChatOpenAI
 from langchain.document_loaders.youtube import YoutubeLoader
-from langchain_groq import ChatGroq
+from utils.clients import get_chat_model
 
 # llm = ChatOpenAI(
 #     temperature=0.1,
 #     model="gpt-3.5-turbo-1106",
 # )
 
-llm = ChatGroq(
-    temperature=0.1,
-    model_name="llama-3.1-70b-versatile",
-)
+llm = get_chat_model("groq", "llama-3.1-70b-versatile")
 
 st.set_page_config(
     page_title="Youtube Summary GPT",
@@ -1,12 +1,12 @@
 import streamlit as st
 from langchain.prompts import ChatPromptTemplate
-from langchain.schema.runnable import RunnablePassthrough, RunnableLambda
-from langchain.callbacks.base import BaseCallbackHandler
-from langchain.memory import ConversationTokenBufferMemory
-from langchain_groq import ChatGroq
-from langchain_community.vectorstores import FAISS
-from langchain_community.document_loaders import OnlinePDFLoader
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_community.document_loaders import UnstructuredPDFLoader
+from utils.chat_engine import ChatPage, require_login
+from utils.clients import get_huggingface_embeddings
+from utils.doc_cache import cached_embeddings, document_key
+from utils.hybrid import hybrid_retriever, load_keyword_index
+from utils.index_store import load_or_build_index
+from utils.url_cache import fetch_url
 
 # loader = OnlinePDFLoader("https://arxiv.org/pdf/2302.03803.pdf")
 
@@ -17,82 +17,36 @@ st.set_page_config(
     page_icon="📃",
 )
 
-callback = False
+page = ChatPage("groq1", "groq", "Llama3-70b-8192")
 
 
-class ChatCallbackHandler(BaseCallbackHandler):
-    message = ""
-
-    def on_llm_start(self, *args, **kwargs):
-        if callback:
-            self.message_box = st.empty()
-
-    def on_llm_end(self, *args, **kwargs):
-        if callback:
-            save_messages(self.message, "ai")
-
-    def on_llm_new_token(self, token, *args, **kwargs):
-        if callback:
-            self.message += token
-            self.message_box.markdown(self.message)
-
-
-if "groq1_messages" not in st.session_state:
-    st.session_state["groq1_messages"] = []
-
-llm = ChatGroq(
-    temperature=0.1,
-    model_name="Llama3-70b-8192",
-    streaming=True,
-    callbacks=[ChatCallbackHandler()],
-)
-
-memory = ConversationTokenBufferMemory(
-    llm=llm,
-    max_token_limit=1000,
-    return_messages=True,
-)
-
-if "groq1_chat_summary" not in st.session_state:
-    st.session_state["groq1_chat_summary"] = []
-else:
-    callback = False
-    for chat_list in st.session_state["groq1_chat_summary"]:
-        memory.save_context(
-            {"input": chat_list["question"]},
-            {"output": chat_list["answer"]},
-        )
-
-
-def save_messages(message, role):
-    st.session_state["groq1_messages"].append(
-        {
-            "message": message,
-            "role": role,
-        }
+@st.cache_resource(show_spinner="Embedding file...")
+def load_pdf_index(file_hash, file_path):
+    # 같은 PDF(내용 해시 기준)는 프로세스당 한 번, 디스크에 인덱스가 있으면 그걸 로드
+    embeddings = get_huggingface_embeddings()
+    key = document_key(
+        file_hash.encode("utf-8"),
+        embeddings.model_name,
+        loader="unstructured-pdf",
+        splitter="recursive",
     )
 
+    def load_docs():
+        loader = UnstructuredPDFLoader(file_path)
+        return loader.load_and_split()
 
-def send_message(message, role, save=True):
-    with st.chat_message(role):
-        st.markdown(message)
-    if save:
-        save_messages(message, role)
-
-
-def paint_history():
-    for message in st.session_state["groq1_messages"]:
-        send_message(message["message"], message["role"], save=False)
+    vectorstore = load_or_build_index(
+        key, cached_embeddings(embeddings, embeddings.model_name), load_docs
+    )
+    keywords = load_keyword_index(key, vectorstore)
+    retriver = hybrid_retriever(vectorstore, keywords)
+    return retriver
 
-def format_docs(docs):
-    return "\n\n".join(document.page_content for document in docs)
 
 def embed_file(url):
-    loader = OnlinePDFLoader(url)
-    pages = loader.load_and_split()
-    vectorstore = FAISS.from_documents(pages, HuggingFaceEmbeddings())
-    retriver = vectorstore.as_retriever()
-    return retriver
+    with st.spinner("Checking PDF..."):
+        document = fetch_url(url)
+    return load_pdf_index(document["hash"], document["path"])
 
 with st.sidebar:
     pdf_url = st.text_input(
@@ -118,39 +72,9 @@ prompt = ChatPromptTemplate.from_template(
 )
 
 
-def load_memory(_):
-    return memory.load_memory_variables({})["history"]
-
-
-def save_context(question, result):
-    st.session_state["groq1_chat_summary"].append(
-        {
-            "question": question,
-            "answer": result,
-        }
-    )
-
-
-def invoke_chain(question):
-    result = chain.invoke(
-        {"question": question},
-    )
-    save_context(message, result.content)
-
-
 st.title("Groq-Llama3 Chatbot")
 
-st.markdown("""
-    <style>
-    .big-font {
-        font-size:30px !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-
-if "authentication_status" not in st.session_state:
-    st.markdown("<p class='big-font'>You need to log in from the 'Home' page in the left sidebar.</p>", unsafe_allow_html=True)
-else:
+if require_login():
     st.markdown(
         """
         Welcome!
@@ -159,28 +83,5 @@ else:
         
         """
     )
-
-    authentication_status = st.session_state["authentication_status"]
-    if authentication_status:
-        if pdf_url:
-            retriever = embed_file(pdf_url)
-            send_message("I'm ready! Ask away!", "ai", save=False)
-            paint_history()
-            message = st.chat_input("Ask anything about pdf url...")
-            if message:
-                send_message(message, "human")
-                chain = (
-                    {
-                        "context": retriever | RunnableLambda(format_docs),
-                        "question": RunnablePassthrough(),
-                    }
-                    | prompt
-                    | llm
-                )
-                with st.chat_message("ai"):
-                    print(message)
-                    chain.invoke(message)
-    else:
-        st.markdown("<p class='big-font'>You need to log in from the 'Home' page in the left sidebar.</p>", unsafe_allow_html=True)
-
-
+    if pdf_url:
+        page.chat(prompt, retriever=embed_file(pdf_url), placeholder="Ask anything about pdf url...")
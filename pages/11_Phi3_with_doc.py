@@ -1,20 +1,8 @@
 import streamlit as st
-from langchain.document_loaders.unstructured import UnstructuredFileLoader
-from langchain.text_splitter import CharacterTextSplitter
-from langchain.embeddings.ollama import OllamaEmbeddings
-from langchain.embeddings.cache import CacheBackedEmbeddings
-from langchain.vectorstores.faiss import FAISS
-from langchain.storage import LocalFileStore
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.schema.runnable import RunnablePassthrough, RunnableLambda
-from langchain_community.chat_models import ChatOllama
-from langchain.callbacks.base import BaseCallbackHandler
 import os
-from langchain.globals import set_llm_cache
-from langchain.cache import SQLiteCache
-from langchain.memory import ConversationTokenBufferMemory
-
-set_llm_cache(SQLiteCache("cache.db"))
+from utils.chat_engine import ChatPage
+from utils.ingest import ingest_sidebar, show_progress
 
 os.environ['KMP_DUPLICATE_LIB_OK']='True'
 
@@ -24,108 +12,6 @@ st.set_page_config(
 )
 
 
-class ChatCallbackHandler(BaseCallbackHandler):
-    message = ""
-
-    def on_llm_start(self, *args, **kwargs):
-        self.message_box = st.empty()
-
-    def on_llm_end(self, *args, **kwargs):
-        save_messages(self.message, "ai")
-
-    def on_llm_new_token(self, token, *args, **kwargs):
-        self.message += token
-        self.message_box.markdown(self.message)
-
-if "Phi3_doc_messages" not in st.session_state:
-    st.session_state["Phi3_doc_messages"] = []
-
-llm = ChatOllama(
-    model="phi3:3.8b",
-    temperature=0.1,
-    streaming=True,
-    callbacks=[ChatCallbackHandler()],
-)
-
-memory = ConversationTokenBufferMemory(
-    llm=llm,
-    max_token_limit=2000,
-    return_messages=True,
-)
-
-if "Phi3_doc_summary" not in st.session_state:
-    st.session_state["Phi3_doc_summary"] = []
-
-    for chat_list in st.session_state["Phi3_doc_summary"]:
-        memory.save_context(
-            {"input": chat_list["question"]},
-            {"output": chat_list["answer"]},
-        )
-
-
-@st.cache_data(show_spinner="Embedding file...")
-def embed_file(file):
-    file_content = file.read()
-    file_path = f"./.cache/private_files/{file.name}"
-    with open(file_path, "wb") as f:
-        f.write(file_content)
-    cache_dir = LocalFileStore(f"./.cache/private_embeddings/{file.name}")
-    splitter = CharacterTextSplitter.from_tiktoken_encoder(
-        separator="\n",
-        chunk_size=600,
-        chunk_overlap=100,
-    )
-    loader = UnstructuredFileLoader(file_path)
-    docs = loader.load_and_split(text_splitter=splitter)
-    embeddings = OllamaEmbeddings(model="phi3:3.8b")
-    cached_embeddings = CacheBackedEmbeddings.from_bytes_store(embeddings, cache_dir)
-    vectorstore = FAISS.from_documents(docs, cached_embeddings)
-    retriver = vectorstore.as_retriever()
-    return retriver
- 
-
-def save_messages(message, role):
-    st.session_state["Phi3_doc_messages"].append(
-        {
-            "message": message,
-            "role": role,
-        }
-    )
-
-
-def send_message(message, role, save=True):
-    with st.chat_message(role):
-        st.markdown(message)
-    if save:
-        save_messages(message, role)
-
-
-def paint_history():
-    for message in st.session_state["Phi3_doc_messages"]:
-        send_message(message["message"], message["role"], save=False)
-
-
-def format_docs(docs):
-    return "\n\n".join(document.page_content for document in docs)
-
-def load_memory(_):
-    loaded_memory = memory.load_memory_variables({})["history"]
-    return loaded_memory
-
-def save_context(question, result):
-    st.session_state["Phi3_doc_summary"].append(
-        {
-            "question": question,
-            "answer": result,
-        }
-    )
-
-def invoke_chain(question):
-    result = chain.invoke(
-        {"question": question},
-    )
-    save_context(message, result.content)
-
 # prompt = ChatPromptTemplate.from_template(
 #     """         
 #     Given the context, please provide a detailed and easy-to-understand explanation regarding the question. 
@@ -181,29 +67,27 @@ st.markdown(
     """
 )
 
-with st.sidebar:
-    file = st.file_uploader(
-        "Upload a .txt .pdf or .docx file",
-        type=["pdf", "txt", "docx"],
-    )
+page = ChatPage(
+    "Phi3_doc",
+    "ollama",
+    "phi3:3.8b",
+    memory={"max_token_limit": 2000, "summarizer": ("ollama", "phi3:3.8b")},
+    semantic_cache=True,
+    llm_cache=True,
+    summary_key="Phi3_doc_summary",
+)
+
+corpus, doc_ids = ingest_sidebar("phi3:3.8b")
 
-if file:
-    retriever = embed_file(file)
-    send_message("I'm ready! Ask away!", "ai", save=False)
-    paint_history()
-    message = st.chat_input("Ask anything about your file...")
-    if message:
-        send_message(message, "human")
-        chain = (
-            {
-                "context": retriever | RunnableLambda(format_docs),
-                "history": RunnableLambda(load_memory),
-                "question": RunnablePassthrough()
-            }
-            | prompt
-            | llm
-        )
-        with st.chat_message("ai"):
-            invoke_chain(message)
+if doc_ids:
+    page.chat(
+        prompt,
+        retriever=corpus.as_retriever(doc_ids),
+        cache_scope=sorted(doc_ids),
+        placeholder="Ask anything about your files...",
+    )
 else:
-    st.session_state["messages"] = []
+    page.reset_memory()
+
+if show_progress():
+    st.rerun()
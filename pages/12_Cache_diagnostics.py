@@ -0,0 +1,48 @@
+import streamlit as st
+from utils.chat_engine import require_login
+from utils.llm_cache import get_llm_cache
+from utils.scheduler import get_scheduler
+from utils.warmup import get_warmer
+
+st.set_page_config(
+    page_title="Cache diagnostics",
+    page_icon="🗄️",
+)
+
+st.title("LLM Cache Diagnostics")
+
+if require_login():
+    cache = get_llm_cache()
+
+    st.markdown(
+        f"""
+        Shared response cache used by the Ollama pages, partitioned by model.
+
+        - File: `{cache.path}` ({cache.file_size() / 1024 / 1024:.1f} MB including WAL)
+        - Budget: {cache.max_bytes / 1024 / 1024:.0f} MB, entries expire after {cache.max_age / 86400:.0f} days
+        - Hit/miss counts are for this server process since it started.
+        """
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Run eviction now"):
+            st.success(f"Removed {cache.evict()} entries.")
+    with col2:
+        if st.button("Clear cache"):
+            cache.clear()
+            st.success("Cache cleared.")
+
+    summary = cache.summary()
+    if summary:
+        st.dataframe(summary, use_container_width=True)
+    else:
+        st.info("The cache is empty.")
+
+    st.subheader("Ollama models")
+    st.caption(
+        "Loaded models and their keep_alive, which is refreshed after every request "
+        "from the last hour of traffic."
+    )
+    st.dataframe(get_warmer().status(), use_container_width=True)
+    st.json(get_scheduler().snapshot())
@@ -0,0 +1,152 @@
+import streamlit as st
+from langchain.prompts import ChatPromptTemplate
+from langchain.callbacks.base import BaseCallbackHandler
+from utils.async_runner import start_chain, stream_together
+from utils.chat_engine import require_login
+from utils.clients import get_chat_model
+from utils.compare import BACKENDS, answer_stats, format_stats
+from utils.context import count_tokens
+from utils.render import render_message
+from utils.streaming import StreamRenderer
+
+st.set_page_config(
+    page_title="Model compare",
+    page_icon="⚖️",
+    layout="wide",
+)
+
+
+class ColumnCallbackHandler(BaseCallbackHandler):
+    # 답변마다 자기 column의 placeholder에 그림
+    def __init__(self, placeholder):
+        self.placeholder = placeholder
+
+    def on_llm_start(self, *args, **kwargs):
+        self.renderer = StreamRenderer(self.placeholder)
+
+    def on_llm_end(self, *args, **kwargs):
+        self.message = self.renderer.close()
+
+    def on_llm_new_token(self, token, *args, **kwargs):
+        self.renderer.write(token)
+
+
+if "compare_runs" not in st.session_state:
+    st.session_state["compare_runs"] = []
+
+with st.sidebar:
+    labels = st.multiselect(
+        "Models",
+        list(BACKENDS),
+        default=["Groq · llama-3.1-70b", "OpenAI · gpt-4o-mini", "Ollama · phi3"],
+    )
+    prompt_text = st.text_area(
+        "Prompt",
+        """You are an engineering expert. explain my question in detail in Korean.""",
+    )
+
+prompt = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            f"""
+            {prompt_text}
+            """,
+        ),
+        ("human", "{question}"),
+    ]
+)
+
+
+def start_compare(question):
+    # 선택한 모델 모두에 동시에 보냄, 속도를 재야 하므로 LLM cache는 끔
+    previous = st.session_state.get("compare_pending")
+    if previous is not None:
+        for generation in previous["generations"]:
+            generation.cancel()
+    generations = []
+    for label in labels:
+        backend, model = BACKENDS[label]
+        chain = prompt | get_chat_model(backend, model, cache=False)
+        generations.append(
+            start_chain(
+                chain,
+                {"question": question},
+                model=model if backend == "ollama" else None,
+                page="compare",
+            )
+        )
+    st.session_state["compare_pending"] = {
+        "question": question,
+        "labels": list(labels),
+        "generations": generations,
+        "prompt_tokens": count_tokens(prompt_text) + count_tokens(question),
+    }
+
+
+def paint_answer(answer):
+    st.markdown(f"**{answer['label']}**")
+    if answer["error"]:
+        st.error(answer["error"])
+    else:
+        st.html(render_message(answer["text"]))
+        st.caption(format_stats(answer["stats"]))
+
+
+def paint_run(run):
+    with st.chat_message("human"):
+        st.markdown(run["question"])
+    for column, answer in zip(st.columns(len(run["answers"])), run["answers"]):
+        with column:
+            paint_answer(answer)
+    rows = [{"model": answer["label"], **answer["stats"]} for answer in run["answers"] if answer["stats"]]
+    if rows:
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+
+
+def finish_compare(pending):
+    # 모든 답변을 나란히 스트리밍하고, 끝나면 지표와 함께 기록으로 옮김
+    with st.chat_message("human"):
+        st.markdown(pending["question"])
+    handlers = []
+    for column, label in zip(st.columns(len(pending["labels"])), pending["labels"]):
+        with column:
+            st.markdown(f"**{label}**")
+            handlers.append(ColumnCallbackHandler(st.empty()))
+    stream_together(pending["generations"], handlers)
+    answers = []
+    for label, generation in zip(pending["labels"], pending["generations"]):
+        _, model = BACKENDS[label]
+        error = str(generation.error) if generation.error is not None else None
+        answers.append(
+            {
+                "label": label,
+                "text": generation.text,
+                "error": error,
+                "stats": None if error else answer_stats(generation, model, pending["prompt_tokens"]),
+            }
+        )
+    del st.session_state["compare_pending"]
+    st.session_state["compare_runs"].append({"question": pending["question"], "answers": answers})
+    st.rerun()
+
+
+st.title("Model Comparison")
+
+st.markdown(
+    """
+    Send one question to several models at once and compare the answers side by side.
+
+    Each answer shows time to first token, total time, output tokens/s and cost
+    (token counts are approximate; local Ollama models cost nothing).
+    """
+)
+
+if require_login():
+    for run in st.session_state["compare_runs"]:
+        paint_run(run)
+    message = st.chat_input("Ask all selected models...", disabled=not labels)
+    if message:
+        start_compare(message)
+    if "compare_pending" in st.session_state:
+        finish_compare(st.session_state["compare_pending"])
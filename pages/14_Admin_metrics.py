@@ -0,0 +1,51 @@
+import streamlit as st
+from utils.chat_engine import require_login
+from utils.metrics import FIELDS, get_metrics_store, summarize
+
+st.set_page_config(
+    page_title="Admin metrics",
+    page_icon="📈",
+    layout="wide",
+)
+
+st.title("Admin Metrics")
+
+WINDOWS = {
+    "Last hour": 60 * 60,
+    "Last 24 hours": 24 * 60 * 60,
+    "Last 7 days": 7 * 24 * 60 * 60,
+}
+
+if require_login():
+    store = get_metrics_store()
+
+    st.markdown(
+        f"""
+        Timings (seconds) and token counts recorded for every chain call, p50/p95 per model and per page.
+
+        - `queue`: waiting for the local Ollama scheduler; `first_token` includes it
+        - `retrieval`, `context` (packing retrieved chunks), `memory` (history sync and load), `prompt`: chain stages
+        - `llm`: model call; `tokens_per_s`: output tokens per second while streaming
+        - Records are kept in `{store.path}/` for {store.keep_days} days, one JSONL file per day.
+        """
+    )
+
+    window = st.selectbox("Window", list(WINDOWS), index=1)
+    records = store.load(WINDOWS[window])
+    if not records:
+        st.info("No chain calls recorded in this window.")
+    else:
+        fields = st.multiselect("Metrics", FIELDS, default=["total", "first_token", "tokens_per_s", "retrieval"])
+        columns = ["requests", "cache hits", "errors"] + [
+            f"{field} {p}" for field in fields for p in ("p50", "p95")
+        ]
+        for by in ("model", "page"):
+            st.subheader(f"Per {by}")
+            rows = [
+                {by: row[by], **{column: row.get(column) for column in columns}}
+                for row in summarize(records, by)
+            ]
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+
+        with st.expander(f"Last {min(len(records), 50)} calls"):
+            st.dataframe(records[-50:][::-1], use_container_width=True, hide_index=True)
@@ -0,0 +1,211 @@
+import asyncio
+import threading
+import time
+
+import streamlit as st
+from langchain.callbacks.base import AsyncCallbackHandler
+from langchain.schema import AIMessage
+
+from utils.metrics import MetricsCallback, get_metrics_store, pop_stages
+from utils.scheduler import get_event_loop, get_scheduler
+from utils.warmup import get_warmer
+
+
+def _check_rerun():
+    # Streamlit은 session_state에 접근할 때 rerun/stop 요청을 확인하고 스크립트를 멈춤
+    # 화면에 아무것도 그리지 않는 대기(queue, prefill) 중에도 새 질문이 바로 들어오도록
+    "" in st.session_state
+
+
+class _TokenCollector(AsyncCallbackHandler):
+    def __init__(self, generation):
+        self.generation = generation
+
+    async def on_llm_new_token(self, token, **kwargs):
+        self.generation._push(token)
+
+
+class Generation:
+    """One chain call running as a task on the shared background loop.
+
+    The script thread only replays the collected tokens into a page's
+    callback handler, so a rerun never blocks on (or restarts) the model
+    call: the next run picks the same generation up with resume_chain().
+    cancel() cancels the task, which closes the HTTP stream so Ollama
+    stops generating (or simply leaves the scheduler queue).
+    """
+
+    def __init__(self, chain, input, on_done=None, model=None, scheduler=None, warmer=None, metrics=None):
+        self.chain = chain
+        self.input = input
+        self.on_done = on_done
+        self.model = model
+        self.scheduler = scheduler
+        self.warmer = warmer
+        self.metrics = metrics
+        self.ticket = None
+        self.tokens = []
+        self.result = None
+        self.error = None
+        self.finished = False
+        self.handled = False
+        self.updated = threading.Event()
+        self.future = None
+        self.started = self.first_token = self.ended = None
+
+    @property
+    def text(self):
+        return "".join(self.tokens)
+
+    def _push(self, token):
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+        self.tokens.append(token)
+        self.updated.set()
+
+    async def _invoke(self):
+        # astream은 LLM cache를 건너뛰므로 ainvoke + 토큰 콜백으로 스트리밍 (cache hit면 토큰 없이 결과만 옴)
+        callbacks = [_TokenCollector(self)]
+        if self.metrics is not None:
+            callbacks.append(self.metrics)
+        self.result = await self.chain.ainvoke(self.input, config={"callbacks": callbacks})
+        if not self.tokens:
+            self._push(self.result.content)
+
+    def _set_ticket(self, ticket):
+        self.ticket = ticket
+        self.updated.set()
+
+    async def _run(self):
+        try:
+            if self.scheduler is None:
+                await self._invoke()
+            else:
+                async with self.scheduler.slot(self.model, on_ticket=self._set_ticket) as ticket:
+                    self.updated.set()
+                    if self.metrics is not None:
+                        self.metrics.queue = ticket.waited
+                    await self._invoke()
+                    if self.warmer is not None:
+                        # 요청이 끝나면 Ollama가 기본값(5분)으로 되돌린 keep_alive를 트래픽에 맞게 다시 설정
+                        # slot 안에서 해야 다음 요청의 다른 모델과 겹쳐 모델이 바뀌지 않음
+                        await self.warmer.refresh(self.model)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.ended = time.perf_counter()
+            self.finished = True
+            self.updated.set()
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.future = asyncio.run_coroutine_threadsafe(self._run(), get_event_loop())
+        return self
+
+    def cancel(self):
+        if self.future is not None and not self.finished:
+            self.future.cancel()
+
+    def stream(self, handler):
+        status = st.empty()
+        waiting = None
+        handler.on_llm_start()
+        position = 0
+        while True:
+            self.updated.wait(0.1)
+            self.updated.clear()
+            _check_rerun()
+            if self.ticket is not None and self.ticket.granted is None:
+                ahead = self.scheduler.position(self.ticket)
+                if ahead != waiting:
+                    waiting = ahead
+                    status.caption(f"⏳ Waiting for {self.model}: {ahead} request(s) ahead")
+            elif waiting is not None:
+                waiting = None
+                status.empty()
+            while position < len(self.tokens):
+                handler.on_llm_new_token(self.tokens[position])
+                position += 1
+            if self.finished and position == len(self.tokens):
+                break
+        if self.error is not None:
+            self.handled = True
+            raise self.error
+        handler.on_llm_end()
+        if not self.handled:
+            # 중간에 rerun 되어 다음 실행에서 이어 받은 경우에도 후처리는 한 번만
+            self.handled = True
+            if self.on_done is not None:
+                self.on_done(self.text)
+        return AIMessage(content=self.text)
+
+
+def start_chain(chain, input, on_done=None, model=None, page=None):
+    # model을 주면 (로컬 Ollama 모델) 프로세스 공용 scheduler의 대기열을 거침
+    # 단계별 시간과 토큰 수는 page 이름으로 metrics에 남김
+    scheduler = warmer = None
+    if model is not None:
+        scheduler, warmer = get_scheduler(), get_warmer()
+        warmer.record(model)
+    metrics = MetricsCallback(get_metrics_store(), page, stages=pop_stages())
+    return Generation(
+        chain, input, on_done=on_done, model=model, scheduler=scheduler, warmer=warmer, metrics=metrics
+    ).start()
+
+
+def run_in_background(chain, input, model=None, page=None):
+    # 화면에 그리지 않는 호출 (메모리 요약 등): 결과는 concurrent.futures.Future로 받음
+    scheduler = get_scheduler() if model is not None else None
+    metrics = MetricsCallback(get_metrics_store(), page)
+
+    async def run():
+        if scheduler is None:
+            return await chain.ainvoke(input, config={"callbacks": [metrics]})
+        async with scheduler.slot(model) as ticket:
+            metrics.queue = ticket.waited
+            return await chain.ainvoke(input, config={"callbacks": [metrics]})
+
+    return asyncio.run_coroutine_threadsafe(run(), get_event_loop())
+
+
+def run_chain(key, chain, input, handler, on_done=None, model=None):
+    # 같은 key(페이지)에서 아직 돌고 있던 답변은 취소하고 새로 시작
+    previous = st.session_state.get(key)
+    if previous is not None and not previous.handled:
+        previous.cancel()
+    generation = start_chain(chain, input, on_done=on_done, model=model, page=key.removesuffix("_generation"))
+    st.session_state[key] = generation
+    return generation.stream(handler)
+
+
+def resume_chain(key, handler):
+    # 이전 실행이 rerun으로 끊겼으면 같은 답변을 이어서 그림
+    generation = st.session_state.get(key)
+    if generation is None or generation.handled:
+        return None
+    with st.chat_message("ai"):
+        return generation.stream(handler)
+
+
+def stream_together(generations, handlers, interval=0.05):
+    # 비교 페이지: 여러 답변을 한 스크립트 스레드에서 번갈아 그림, 실패한 답변은 error로 남김
+    for handler in handlers:
+        handler.on_llm_start()
+    positions = [0] * len(generations)
+    while True:
+        done = True
+        for i, (generation, handler) in enumerate(zip(generations, handlers)):
+            while positions[i] < len(generation.tokens):
+                handler.on_llm_new_token(generation.tokens[positions[i]])
+                positions[i] += 1
+            done = done and generation.finished and positions[i] == len(generation.tokens)
+        if done:
+            break
+        time.sleep(interval)
+        _check_rerun()
+    for generation, handler in zip(generations, handlers):
+        handler.on_llm_end()
+        if not generation.handled:
+            generation.handled = True
+            if generation.error is None and generation.on_done is not None:
+                generation.on_done(generation.text)
@@ -0,0 +1,267 @@
+from operator import itemgetter
+
+import streamlit as st
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain.globals import set_llm_cache
+from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain.schema import AIMessage, SystemMessage
+from langchain.schema.runnable import RunnableLambda, RunnablePassthrough
+
+from utils.async_runner import resume_chain, run_chain
+from utils.clients import get_chat_model, get_huggingface_embeddings, get_ollama_embeddings
+from utils.context import context_budget, count_tokens, pack_context
+from utils.history_store import get_chat_history
+from utils.llm_cache import get_llm_cache
+from utils.memory import get_session_memory
+from utils.render import render_message
+from utils.semantic_cache import cache_namespace, semantic_cache_sidebar
+from utils.streaming import StreamRenderer
+from utils.warmup import warm_model
+
+TRANSLATE_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", "Translate the sentence you answered before into Korean."),
+        ("human", "{question}"),
+    ]
+)
+
+LOGIN_NOTICE = "<p class='big-font'>You need to log in from the 'Home' page in the left sidebar.</p>"
+BIG_FONT_STYLE = """
+    <style>
+    .big-font {
+        font-size:30px !important;
+    }
+    </style>
+    """
+
+
+def chat_prompt(system):
+    # 채팅 페이지 공통: system prompt + 대화 기록 + 질문
+    return ChatPromptTemplate.from_messages(
+        [
+            (
+                "system",
+                f"""
+                {system}
+                """,
+            ),
+            MessagesPlaceholder(variable_name="history"),
+            ("human", "{question}"),
+        ]
+    )
+
+
+def require_login():
+    # 로그인 전이면 안내만 보여 주고 False
+    if st.session_state.get("authentication_status"):
+        return True
+    st.markdown(BIG_FONT_STYLE, unsafe_allow_html=True)
+    st.markdown(LOGIN_NOTICE, unsafe_allow_html=True)
+    return False
+
+
+class ChatCallbackHandler(BaseCallbackHandler):
+    """Streams the answer into the current container and saves it at the end."""
+
+    def __init__(self, page):
+        self.page = page
+        self.message = ""
+
+    def on_llm_start(self, *args, **kwargs):
+        self.renderer = StreamRenderer(st.empty())
+
+    def on_llm_end(self, *args, **kwargs):
+        self.message = self.renderer.close()
+        self.page.save_message(self.message, "ai")
+
+    def on_llm_new_token(self, token, *args, **kwargs):
+        self.renderer.write(token)
+
+
+class ChatPage:
+    """One chat page: model, history, memory, caches and the chat loop.
+
+    Pages only declare what differs between them. `memory` holds the
+    get_session_memory options (recall=True picks embeddings that match
+    the backend, so Ollama pages don't load a second model), or None when
+    the page sends no history. `code` highlights code in painted messages,
+    `semantic_cache` adds the semantic cache controls to the sidebar,
+    `llm_cache` turns on the SQLite LLM cache and `translate` adds the
+    translate button. Session keys default to `name` and can be set
+    one by one so pages keep the histories they already have.
+    """
+
+    def __init__(
+        self,
+        name,
+        backend,
+        model,
+        memory=None,
+        code=False,
+        semantic_cache=False,
+        llm_cache=False,
+        translate=False,
+        messages_key=None,
+        summary_key=None,
+        generation_key=None,
+    ):
+        self.name = name
+        self.backend = backend
+        self.model = model
+        self.code = code
+        self.translate = translate
+        self.messages_key = messages_key or f"{name}_messages"
+        self.summary_key = summary_key or f"{name}_chat_summary"
+        self.generation_key = generation_key or f"{name}_generation"
+        # scheduler/warmer는 로컬 Ollama 모델에만 씀
+        self.ollama_model = model if backend == "ollama" else None
+        if llm_cache:
+            set_llm_cache(get_llm_cache())
+        self.llm = get_chat_model(backend, model)
+        if self.ollama_model is not None:
+            warm_model(model)
+        self.history = get_chat_history(self.messages_key)
+        self.memory = None
+        if memory is not None:
+            if self.summary_key not in st.session_state:
+                # 재접속하면 저장된 기록의 최근 turn으로 memory를 다시 채움
+                st.session_state[self.summary_key] = self.history.turns()
+            options = dict(memory)
+            if options.get("recall") is True:
+                options["recall"] = (
+                    get_ollama_embeddings(model) if backend == "ollama" else get_huggingface_embeddings()
+                )
+            self.memory = get_session_memory(self.summary_key, self.llm, **options)
+        self.semantic_cache = self.cache_threshold = None
+        if semantic_cache:
+            with st.sidebar:
+                self.semantic_cache, self.cache_threshold = semantic_cache_sidebar(model)
+        self.prompt = None
+
+    @property
+    def turns(self):
+        return st.session_state.get(self.summary_key, [])
+
+    def save_message(self, message, role):
+        self.history.append(message, role)
+
+    def send_message(self, message, role, save=True):
+        with st.chat_message(role):
+            st.html(render_message(message, code=self.code))
+        if save:
+            self.save_message(message, role)
+
+    def paint_history(self):
+        self.history.paint_older_button()
+        for message in self.history.messages:
+            self.send_message(message["message"], message["role"], save=False)
+
+    def reset_memory(self):
+        # 저장된 기록은 그대로 두고 (문서를 다시 고르면 이어서 보임) 모델에 보낼 memory만 비움
+        if self.memory is not None and self.turns:
+            # 다음 실행에서 get_session_memory가 memory도 새로 만듦
+            st.session_state[self.summary_key] = []
+
+    def load_memory(self, input):
+        history = self.memory.load_memory_variables(input)["history"]
+        if "context" not in self.prompt.input_variables:
+            return history
+        # 문서 페이지: history는 context 자리의 절반까지만, 넘으면 요약은 두고 오래된 메시지부터 뺌
+        limit = context_budget(self.model) // 2
+        first = 1 if history and isinstance(history[0], SystemMessage) else 0
+        tokens = [count_tokens(message.content) for message in history]
+        total = sum(tokens)
+        while first < len(history) and (total > limit or isinstance(history[first], AIMessage)):
+            total -= tokens.pop(first)
+            del history[first]
+        return history
+
+    def format_docs(self, docs):
+        # 겹치는 chunk는 합치고, 모델 context에서 history가 쓰는 만큼을 뺀 budget은 상한일 뿐 (채우지 않음)
+        # history는 load_memory가 절반 안으로 자르므로 문서 몫은 적어도 절반
+        budget = context_budget(self.model)
+        if self.memory is not None and "history" in self.prompt.input_variables:
+            budget -= min(self.memory.history_tokens, budget // 2)
+        return pack_context(docs, budget)
+
+    def save_context(self, question, answer):
+        if self.memory is None:
+            return
+        self.turns.append({"question": question, "answer": answer})
+        # 답변이 끝나면 바로 밀려난 turn의 요약을 백그라운드에서 시작
+        self.memory.sync(self.turns)
+
+    def cache_context(self):
+        # history를 보내는 페이지: 같은 질문이라도 바로 앞 turn까지 같아야 캐시된 답을 씀
+        # ("그거 더 자세히" 같은 후속 질문이 다른 대화의 답을 받지 않도록)
+        if self.memory is None or "history" not in self.prompt.input_variables or not self.turns:
+            return ()
+        last = self.turns[-1]
+        return (last["question"], last["answer"])
+
+    def build_chain(self, retriever=None):
+        # 입력은 {"question": ...}, retrieval과 memory는 같이(병렬로) 돌림
+        inputs = {}
+        if retriever is not None:
+            inputs["context"] = itemgetter("question") | retriever | RunnableLambda(self.format_docs)
+        if self.memory is not None and "history" in self.prompt.input_variables:
+            inputs["history"] = RunnableLambda(self.load_memory)
+        if not inputs:
+            return self.prompt | self.llm
+        return RunnablePassthrough.assign(**inputs) | self.prompt | self.llm
+
+    def ask(self, question, retriever=None, cache_scope=()):
+        self.send_message(question, "human")
+        with st.chat_message("ai"):
+            vector = None
+            if self.semantic_cache is not None:
+                namespace = cache_namespace(self.model, *cache_scope, *self.cache_context())
+                answer, vector = self.semantic_cache.lookup(question, namespace, self.cache_threshold)
+                if answer is not None:
+                    st.html(render_message(answer, code=self.code))
+                    self.save_message(answer, "ai")
+                    self.save_context(question, answer)
+                    return
+
+            def on_done(answer):
+                self.save_context(question, answer)
+                if vector is not None:
+                    self.semantic_cache.update(namespace, vector, answer)
+
+            run_chain(
+                self.generation_key,
+                self.build_chain(retriever),
+                {"question": question},
+                ChatCallbackHandler(self),
+                on_done=on_done,
+                model=self.ollama_model,
+            )
+
+    def translate_last_answer(self):
+        with st.chat_message("ai"), st.spinner(text="translating..."):
+            run_chain(
+                self.generation_key,
+                TRANSLATE_PROMPT | self.llm,
+                {"question": self.turns[-1]["answer"]},
+                ChatCallbackHandler(self),
+                model=self.ollama_model,
+            )
+
+    def chat(self, prompt, retriever=None, cache_scope=(), placeholder="Ask anything about something..."):
+        """Paints the conversation and answers the next message.
+
+        `retriever` adds a {context} of packed documents to the prompt;
+        `cache_scope` is what a semantic cache hit has to match besides
+        the model (the system prompt, the selected documents); pages that
+        send history also have to match the previous turn.
+        """
+        self.prompt = prompt
+        self.send_message("I'm ready! Ask away!", "ai", save=False)
+        self.paint_history()
+        message = st.chat_input(placeholder)
+        if message:
+            self.ask(message, retriever, cache_scope)
+        else:
+            resume_chain(self.generation_key, ChatCallbackHandler(self))
+        if self.translate and self.turns and st.button("translate"):
+            self.translate_last_answer()
@@ -0,0 +1,38 @@
+import streamlit as st
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_groq import ChatGroq
+from langchain_openai import ChatOpenAI
+
+from utils.context import context_limit
+from utils.embeddings import BatchedOllamaEmbeddings
+from utils.ollama_chat import PooledChatOllama
+from utils.scheduler import get_event_loop, get_scheduler
+
+# 프로세스 당 한 번만 만들고 모든 세션/페이지가 같이 사용
+# 콜백은 인스턴스가 아니라 요청마다 config={"callbacks": [...]} 로 넘긴다
+
+
+@st.cache_resource(show_spinner=False)
+def get_chat_model(backend, model, temperature=0.1, cache=None):
+    # cache=False: set_llm_cache로 건 전역 캐시를 쓰지 않음 (속도 비교용)
+    if backend == "ollama":
+        # num_ctx를 지정하지 않으면 Ollama 기본값(2048)에서 프롬프트 앞부분이 잘림
+        return PooledChatOllama(
+            model=model, temperature=temperature, streaming=True, num_ctx=context_limit(model), cache=cache
+        )
+    if backend == "groq":
+        return ChatGroq(model_name=model, temperature=temperature, streaming=True, cache=cache)
+    if backend == "openai":
+        return ChatOpenAI(model=model, temperature=temperature, streaming=True, cache=cache)
+    raise ValueError(f"Unknown backend: {backend}")
+
+
+@st.cache_resource(show_spinner=False)
+def get_ollama_embeddings(model):
+    # 임베딩도 모델을 올리므로 채팅과 같은 scheduler를 거침
+    return BatchedOllamaEmbeddings(model=model, scheduler=get_scheduler(), loop=get_event_loop())
+
+
+@st.cache_resource(show_spinner="Loading embedding model...")
+def get_huggingface_embeddings():
+    return HuggingFaceEmbeddings()
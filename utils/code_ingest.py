@@ -0,0 +1,76 @@
+import os
+
+from langchain.schema import Document
+from langchain_community.document_loaders.blob_loaders import Blob
+from langchain_community.document_loaders.parsers.language import LanguageParser
+from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
+
+from utils.doc_cache import document_key
+from utils.ingest import text_file
+
+try:
+    import tree_sitter_languages  # noqa: F401
+
+    HAS_TREE_SITTER = True
+except ImportError:
+    HAS_TREE_SITTER = False
+
+CODE_LANGUAGES = {
+    ".py": Language.PYTHON,
+    ".cpp": Language.CPP,
+    ".cc": Language.CPP,
+    ".cxx": Language.CPP,
+    ".c": Language.CPP,
+    ".h": Language.CPP,
+    ".hpp": Language.CPP,
+}
+
+
+def code_language(file_name):
+    return CODE_LANGUAGES.get(os.path.splitext(file_name)[1].lower())
+
+
+def code_splitter(file_name, chunk_size=600, chunk_overlap=50):
+    return RecursiveCharacterTextSplitter.from_language(
+        language=code_language(file_name),
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
+
+
+def iter_code(file_path, file_name):
+    # 함수/클래스 단위로 먼저 나누고 (C++은 tree-sitter가 있을 때만) splitter가 다시 자름
+    language = code_language(file_name)
+    if language == Language.PYTHON or HAS_TREE_SITTER:
+        parser = LanguageParser(language=language.value)
+    else:
+        parser = None
+
+    def docs():
+        if parser is None:
+            with open(file_path, encoding="utf-8", errors="replace") as f:
+                parsed = [Document(page_content=f.read())]
+        else:
+            parsed = parser.lazy_parse(Blob.from_path(file_path))
+        for doc in parsed:
+            doc.metadata["source"] = file_name
+            doc.metadata["language"] = language.value
+            yield doc
+
+    return docs(), None
+
+
+def code_or_text_file(file_content, file_path, file_name, model):
+    # 코드 파일은 확장자에 맞는 언어로 잘라서 chunk 단위로 임베딩, 나머지는 문서처럼
+    language = code_language(file_name)
+    if language is None:
+        return text_file(file_content, file_path, file_name, model)
+    doc_id = document_key(
+        file_content,
+        model,
+        splitter=language.value,
+        chunk_size=600,
+        chunk_overlap=50,
+    )
+    splitter = code_splitter(file_name, chunk_size=600, chunk_overlap=50)
+    return doc_id, lambda: iter_code(file_path, file_name), splitter
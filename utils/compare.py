@@ -0,0 +1,65 @@
+from utils.context import count_tokens
+
+# 비교 페이지에 보일 이름: (backend, model)
+BACKENDS = {
+    "Groq · llama-3.1-70b": ("groq", "llama-3.1-70b-versatile"),
+    "Groq · llama3-70b": ("groq", "llama3-70b-8192"),
+    "OpenAI · gpt-4o": ("openai", "gpt-4o"),
+    "OpenAI · gpt-4o-mini": ("openai", "gpt-4o-mini"),
+    "Ollama · llama3.1": ("ollama", "llama3.1:latest"),
+    "Ollama · codegemma": ("ollama", "codegemma"),
+    "Ollama · phi3": ("ollama", "phi3:3.8b"),
+}
+
+# USD per 1M tokens (input, output), 2024년 공개 가격 기준이라 바뀌면 여기만 고치면 됨
+# 로컬 Ollama는 0, 가격을 모르는 모델은 빠져 있음
+PRICES = {
+    "llama-3.1-70b-versatile": (0.59, 0.79),
+    "llama3-70b-8192": (0.59, 0.79),
+    "llama3-groq-70b-8192-tool-use-preview": (0.89, 0.89),
+    "gpt-4o": (5.00, 15.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "llama3.1:latest": (0.0, 0.0),
+    "llama3:latest": (0.0, 0.0),
+    "codegemma": (0.0, 0.0),
+    "phi3:3.8b": (0.0, 0.0),
+}
+
+
+def answer_cost(model, prompt_tokens, completion_tokens):
+    price = PRICES.get(model)
+    if price is None:
+        return None
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+
+def answer_stats(generation, model, prompt_tokens):
+    # 토큰 수는 모델마다 tokenizer가 달라서 tiktoken 기준 근사치 (모델끼리 비교용)
+    completion_tokens = count_tokens(generation.text)
+    first_token = total = rate = None
+    if generation.first_token is not None:
+        first_token = generation.first_token - generation.started
+        streaming = generation.ended - generation.first_token
+        if streaming > 0 and completion_tokens > 1:
+            rate = completion_tokens / streaming
+    if generation.ended is not None:
+        total = generation.ended - generation.started
+    return {
+        "first token s": first_token,
+        "total s": total,
+        "output tokens": completion_tokens,
+        "tokens/s": rate,
+        "cost $": answer_cost(model, prompt_tokens, completion_tokens),
+    }
+
+
+def format_stats(stats):
+    parts = []
+    if stats["first token s"] is not None:
+        parts.append(f"{stats['first token s']:.2f}s to first token")
+    if stats["total s"] is not None:
+        parts.append(f"{stats['total s']:.1f}s total")
+    if stats["tokens/s"] is not None:
+        parts.append(f"{stats['tokens/s']:.0f} tok/s")
+    parts.append("cost n/a" if stats["cost $"] is None else f"${stats['cost $']:.5f}")
+    return " · ".join(parts)
@@ -0,0 +1,128 @@
+import re
+
+import tiktoken
+
+# 모델이 실제로 쓰는 context window (Ollama 모델은 get_chat_model에서 num_ctx로 맞춤)
+CONTEXT_LIMITS = {
+    "Llama3-70b-8192": 8192,
+    "llama3:latest": 8192,
+    "llama3.1:latest": 8192,
+    "phi3:3.8b": 4096,
+    "codegemma": 8192,
+}
+DEFAULT_CONTEXT_LIMIT = 4096
+# 프롬프트 템플릿 + 질문 + 답변 자리
+RESERVED_TOKENS = 1536
+
+_encoding = None
+
+
+def _encode(text):
+    # splitter와 같은 tiktoken 인코딩으로 셈 (모델별 tokenizer와 정확히 같지는 않음)
+    global _encoding
+    if _encoding is None:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    return _encoding.encode(text, disallowed_special=())
+
+
+def count_tokens(text):
+    return len(_encode(text))
+
+
+def _truncate(text, tokens):
+    return _encoding.decode(_encode(text)[:tokens])
+
+
+def context_limit(model):
+    return CONTEXT_LIMITS.get(model, DEFAULT_CONTEXT_LIMIT)
+
+
+def context_budget(model, reserved=RESERVED_TOKENS):
+    return max(context_limit(model) - reserved, 0)
+
+
+def _source(doc):
+    metadata = doc.metadata
+    return metadata.get("doc_id", metadata.get("source")), metadata.get("page")
+
+
+def _shingles(text, size=3):
+    # 단어 3개씩 묶은 집합: 같은 어휘를 쓰는 다른 문단은 near-duplicate로 보지 않도록
+    words = re.findall(r"\w+", text.lower())
+    return {tuple(words[i : i + size]) for i in range(max(len(words) - size + 1, 1))}
+
+
+def _overlap(first, second, probe=40):
+    # first의 끝과 second의 앞이 겹치면(chunk_overlap) second에서 새로 붙일 부분을 반환
+    head = second[: min(probe, len(second))]
+    start = first.find(head)
+    while start != -1:
+        if second.startswith(first[start:]):
+            return second[len(first) - start :]
+        start = first.find(head, start + 1)
+    return None
+
+
+class _Block:
+    def __init__(self, doc):
+        self.source = _source(doc)
+        self.metadata = doc.metadata
+        self.text = doc.page_content.strip()
+        self.shingles = _shingles(self.text)
+
+
+def pack_context(docs, budget, min_tokens=64, near_duplicate=0.9, separator="\n\n"):
+    """Join retrieved chunks into at most `budget` tokens.
+
+    Chunks are taken in retrieval order. A chunk already contained in (or
+    nearly identical to) an earlier one is dropped, and a chunk that
+    continues or precedes an earlier one from the same page is merged into
+    it without the repeated overlap. A chunk that does not fit is skipped,
+    except that the first one is cut to the budget rather than dropped.
+    """
+    blocks = []
+    used = 0
+    for doc in docs:
+        text = doc.page_content.strip()
+        if not text:
+            continue
+        candidate = _Block(doc)
+        merged = None
+        for block in blocks:
+            if block.source != candidate.source:
+                continue
+            if text in block.text:
+                merged = block
+                break
+            tail = _overlap(block.text, text)
+            if tail is not None:
+                merged, new_text = block, block.text + tail
+                break
+            head = _overlap(text, block.text)
+            if head is not None:
+                merged, new_text = block, text + head
+                break
+        if merged is not None:
+            if text in merged.text:
+                continue
+            extra = count_tokens(new_text) - count_tokens(merged.text)
+            if used + extra <= budget:
+                merged.text = new_text
+                merged.shingles |= candidate.shingles
+                used += extra
+            continue
+        if any(
+            len(candidate.shingles & block.shingles)
+            >= near_duplicate * len(candidate.shingles | block.shingles)
+            for block in blocks
+        ):
+            continue
+        tokens = count_tokens(text) + (count_tokens(separator) if blocks else 0)
+        if used + tokens > budget:
+            if blocks or budget - used < min_tokens:
+                continue
+            candidate.text = _truncate(text, budget - used)
+            tokens = budget - used
+        blocks.append(candidate)
+        used += tokens
+    return separator.join(block.text for block in blocks)
@@ -0,0 +1,201 @@
+import threading
+
+import streamlit as st
+from langchain.schema.runnable import RunnableLambda
+from langchain.vectorstores.faiss import FAISS
+
+from utils.clients import get_ollama_embeddings
+from utils.doc_cache import cached_embeddings, safe_name
+from utils.hybrid import KeywordIndex, hybrid_search, load_keyword_index, save_keyword_index
+from utils.index_store import (
+    ANN_THRESHOLD,
+    has_index,
+    load_index,
+    load_index_meta,
+    remove_vectors,
+    save_index,
+    upgrade_index,
+)
+
+
+class Corpus:
+    """Many documents in one persistent FAISS store.
+
+    Every chunk is stored under the id "<doc_id>:<n>" with doc_id and
+    file_name in its metadata, so documents can be listed, searched
+    separately and removed by index id without re-embedding the others.
+    A BM25 keyword index over the same ids is kept next to the FAISS index
+    and search() fuses both rankings. Documents still being added when the
+    index is saved are recorded with it, and their chunks are dropped on
+    load (the process adding them is gone). `index_kind` is a setting of
+    the one store: below `ann_threshold` chunks it is always Flat, above
+    it upgrade_index rebuilds it as that kind from the stored vectors.
+    """
+
+    def __init__(self, name, embeddings, index_kind="flat", ann_threshold=ANN_THRESHOLD):
+        self.key = f"corpora/{safe_name(name)}"
+        self.embeddings = embeddings
+        self.index_kind = index_kind
+        self.ann_threshold = ann_threshold
+        self.lock = threading.RLock()
+        self.vectorstore = None
+        self.chunk_ids = {}
+        self.pending = set()
+        self.keywords = KeywordIndex()
+        if has_index(self.key):
+            # 추가/삭제를 해야 하므로 mmap(읽기 전용)으로 열지 않음
+            self.vectorstore = load_index(self.key, embeddings, mmap=False)
+            self.keywords = load_keyword_index(self.key, self.vectorstore)
+            for id_ in self.vectorstore.index_to_docstore_id.values():
+                self.chunk_ids.setdefault(id_.rpartition(":")[0], []).append(id_)
+            meta = load_index_meta(self.key)
+            self.index_kind = meta.get("index_kind", index_kind)
+            # 저장할 때 아직 임베딩 중이던 문서는 일부만 들어 있으므로 버림
+            unfinished = [
+                id_
+                for doc_id in meta.get("pending", [])
+                for id_ in self.chunk_ids.pop(doc_id, [])
+            ]
+            if unfinished:
+                remove_vectors(self.vectorstore, unfinished)
+                self.keywords.remove(unfinished)
+                self._save()
+
+    def has(self, doc_id):
+        with self.lock:
+            return doc_id in self.chunk_ids or doc_id in self.pending
+
+    def documents(self):
+        with self.lock:
+            documents = []
+            for doc_id, ids in self.chunk_ids.items():
+                metadata = self.vectorstore.docstore.search(ids[0]).metadata
+                documents.append(
+                    {
+                        "doc_id": doc_id,
+                        "file_name": metadata.get("file_name", doc_id),
+                        "chunks": len(ids),
+                        "added": metadata.get("added"),
+                        "pending": doc_id in self.pending,
+                    }
+                )
+            return sorted(documents, key=lambda document: document["added"] or 0)
+
+    def begin(self, doc_id):
+        # 이미 있거나 다른 세션이 추가하는 중이면 False
+        with self.lock:
+            if self.has(doc_id):
+                return False
+            self.pending.add(doc_id)
+            return True
+
+    def add_embeddings(self, doc_id, texts, vectors, metadatas):
+        with self.lock:
+            ids = self.chunk_ids.setdefault(doc_id, [])
+            new_ids = [f"{doc_id}:{n}" for n in range(len(ids), len(ids) + len(texts))]
+            text_embeddings = list(zip(texts, vectors))
+            if self.vectorstore is None:
+                self.vectorstore = FAISS.from_embeddings(
+                    text_embeddings, self.embeddings, metadatas=metadatas, ids=new_ids
+                )
+            else:
+                self.vectorstore.add_embeddings(text_embeddings, metadatas=metadatas, ids=new_ids)
+            self.keywords.add(new_ids, texts)
+            ids.extend(new_ids)
+
+    def commit(self, doc_id):
+        with self.lock:
+            self.pending.discard(doc_id)
+            if self.vectorstore is None:
+                return
+            self._save()
+
+    def set_index_kind(self, index_kind):
+        # 모든 세션이 같이 쓰는 설정: 바뀌면 지금 있는 벡터로 인덱스를 다시 만들어 저장
+        with self.lock:
+            if index_kind == self.index_kind:
+                return
+            self.index_kind = index_kind
+            if self.vectorstore is not None:
+                self._save()
+
+    def remove(self, doc_id):
+        with self.lock:
+            self.pending.discard(doc_id)
+            ids = self.chunk_ids.pop(doc_id, None)
+            if not ids:
+                return
+            remove_vectors(self.vectorstore, ids)
+            self.keywords.remove(ids)
+            self._save()
+
+    def _save(self):
+        # 문서가 늘거나 줄어 threshold를 넘나들면 여기서 인덱스 종류가 바뀜
+        upgrade_index(self.vectorstore, self.index_kind, self.ann_threshold)
+        # 다른 세션이 추가하는 중인 문서의 chunk도 같이 저장되므로 그 목록을 남김
+        meta = {"pending": sorted(self.pending), "index_kind": self.index_kind}
+        save_index(self.vectorstore, self.key, overwrite=True, meta=meta)
+        save_keyword_index(self.keywords, self.key)
+
+    def search(self, query, k=4, doc_ids=None):
+        if doc_ids is not None and not doc_ids:
+            return []
+        embedding = self.embeddings.embed_query(query)
+        with self.lock:
+            if self.vectorstore is None:
+                return []
+            if doc_ids is None or set(self.chunk_ids) <= set(doc_ids):
+                return hybrid_search(self.vectorstore, self.keywords, query, embedding, k=k)
+            # 선택한 문서의 비율이 작을수록 필터 전에 더 많이 가져옴
+            total = self.vectorstore.index.ntotal
+            selected = sum(len(self.chunk_ids.get(doc_id, ())) for doc_id in doc_ids) or 1
+            fetch_k = min(total, max(20, 5 * k * total // selected))
+            doc_ids = set(doc_ids)
+            return hybrid_search(
+                self.vectorstore,
+                self.keywords,
+                query,
+                embedding,
+                k=k,
+                fetch_k=fetch_k,
+                id_filter=lambda id_: id_.rpartition(":")[0] in doc_ids,
+            )
+
+    def as_retriever(self, doc_ids=None, k=4):
+        return RunnableLambda(lambda query: self.search(query, k=k, doc_ids=doc_ids)).with_config(
+            run_name="retrieval"
+        )
+
+
+@st.cache_resource(show_spinner=False)
+def get_corpus(model):
+    # 임베딩 모델마다 벡터가 다르므로 모델별로 하나의 corpus, 인덱스 종류는 corpus의 설정
+    # (처음 만들 때는 HNSW, 저장된 corpus는 meta.json의 설정을 씀)
+    embeddings = cached_embeddings(get_ollama_embeddings(model), model)
+    return Corpus(model, embeddings, index_kind="hnsw")
+
+
+def corpus_sidebar(corpus):
+    # 문서 목록/삭제 + 검색할 문서 선택. 선택된 doc_id 목록을 반환
+    documents = corpus.documents()
+    with st.sidebar:
+        with st.expander(f"Knowledge base ({len(documents)} documents)", expanded=True):
+            for document in documents:
+                name_column, button_column = st.columns([4, 1])
+                status = "embedding..." if document["pending"] else f"{document['chunks']} chunks"
+                name_column.caption(f"{document['file_name']} · {status}")
+                if button_column.button(
+                    "✕",
+                    key=f"remove-{document['doc_id']}",
+                    disabled=document["pending"],
+                    help="Remove from the knowledge base",
+                ):
+                    corpus.remove(document["doc_id"])
+                    st.rerun()
+        names = {document["doc_id"]: document["file_name"] for document in documents}
+        return st.multiselect(
+            "Search in",
+            list(names),
+            default=list(names),
+            format_func=names.get,
+        )
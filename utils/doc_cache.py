@@ -0,0 +1,43 @@
+import hashlib
+import os
+import re
+
+from langchain.embeddings.cache import CacheBackedEmbeddings
+from langchain.storage import LocalFileStore
+
+CACHE_ROOT = "./.cache"
+
+
+def safe_name(name):
+    return re.sub(r"[^\w.-]", "_", name)
+
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def document_key(content, model, **params):
+    # 같은 내용이라도 임베딩 모델이나 splitter 설정이 다르면 다른 인덱스
+    digest = hashlib.sha256(content)
+    digest.update(f"|model={model}".encode("utf-8"))
+    for name in sorted(params):
+        digest.update(f"|{name}={params[name]}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def save_file(content, file_name):
+    # 파일 이름이 아니라 내용으로 저장 (확장자는 loader가 형식을 판단하는 데 필요)
+    suffix = os.path.splitext(file_name)[1].lower()
+    file_dir = f"{CACHE_ROOT}/files"
+    os.makedirs(file_dir, exist_ok=True)
+    file_path = f"{file_dir}/{content_hash(content)}{suffix}"
+    if not os.path.exists(file_path):
+        with open(file_path, "wb") as f:
+            f.write(content)
+    return file_path
+
+
+def cached_embeddings(embeddings, model):
+    # CacheBackedEmbeddings가 텍스트 해시로 키를 만들기 때문에 모델별로 하나의 store를 공유
+    store = LocalFileStore(f"{CACHE_ROOT}/embeddings/{safe_name(model)}")
+    return CacheBackedEmbeddings.from_bytes_store(embeddings, store)
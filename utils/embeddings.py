@@ -0,0 +1,124 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from langchain_core.embeddings import Embeddings
+from requests.adapters import HTTPAdapter
+
+from utils.scheduler import held_slot
+
+
+class BatchedOllamaEmbeddings(Embeddings):
+    """Ollama embeddings sent in batches over a bounded pool of workers.
+
+    Uses /api/embed (one request per batch) and falls back to the older
+    one-text-per-request /api/embeddings on servers that don't have it.
+    Texts get the same passage/query prefixes as OllamaEmbeddings. With a
+    `scheduler` (and the `loop` it runs on) every batch waits for a slot
+    like a chat request, so embedding an upload never swaps out the model
+    another session is answering with.
+    """
+
+    def __init__(
+        self,
+        model,
+        base_url="http://localhost:11434",
+        batch_size=32,
+        max_workers=4,
+        timeout=300,
+        embed_instruction="passage: ",
+        query_instruction="query: ",
+        scheduler=None,
+        loop=None,
+    ):
+        self.model = model
+        self.scheduler = scheduler
+        self.loop = loop
+        self.base_url = base_url
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.embed_instruction = embed_instruction
+        self.query_instruction = query_instruction
+        self.last_stats = None
+        self._legacy_api = False
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _post(self, path, payload):
+        try:
+            response = self.session.post(
+                f"{self.base_url}{path}", json=payload, timeout=self.timeout
+            )
+        except requests.exceptions.RequestException as e:
+            raise ValueError(f"Error raised by inference endpoint: {e}")
+        return response
+
+    def _embed_legacy(self, texts):
+        embeddings = []
+        for text in texts:
+            response = self._post("/api/embeddings", {"model": self.model, "prompt": text})
+            if response.status_code != 200:
+                raise ValueError(
+                    f"Error raised by inference API HTTP code: {response.status_code}, {response.text}"
+                )
+            embeddings.append(response.json()["embedding"])
+        return embeddings
+
+    def _embed_batch(self, texts):
+        if self._legacy_api:
+            return self._embed_legacy(texts)
+        response = self._post("/api/embed", {"model": self.model, "input": texts})
+        if response.status_code == 404 and "model" not in response.text:
+            self._legacy_api = True
+            return self._embed_legacy(texts)
+        if response.status_code != 200:
+            raise ValueError(
+                f"Error raised by inference API HTTP code: {response.status_code}, {response.text}"
+            )
+        return response.json()["embeddings"]
+
+    def _scheduled(self):
+        # 이미 slot 안이면 (답변 중의 retrieval 등) 그 요청의 일부라 바로 보냄
+        # 같은 scheduler의 slot을 또 기다리면 max_concurrent가 다 찼을 때 멈춤
+        # loop 스레드 안에서 부르면 result()가 loop를 막으므로 역시 바로 보냄
+        if self.scheduler is None or held_slot.get() is not None:
+            return False
+        try:
+            return asyncio.get_running_loop() is not self.loop
+        except RuntimeError:
+            return True
+
+    def _embed_in_slot(self, texts):
+        async def run():
+            async with self.scheduler.slot(self.model):
+                return await asyncio.to_thread(self._embed_batch, texts)
+
+        return asyncio.run_coroutine_threadsafe(run(), self.loop).result()
+
+    def embed_texts(self, texts):
+        started = time.perf_counter()
+        batches = [
+            texts[i : i + self.batch_size] for i in range(0, len(texts), self.batch_size)
+        ]
+        # slot 여부는 호출한 thread에서 정함 (pool의 thread에는 context가 넘어가지 않음)
+        embed = self._embed_in_slot if self._scheduled() else self._embed_batch
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = list(pool.map(embed, batches))
+        elapsed = time.perf_counter() - started
+        self.last_stats = {
+            "chunks": len(texts),
+            "seconds": elapsed,
+            "chunks_per_second": len(texts) / elapsed if elapsed else 0.0,
+        }
+        return [embedding for batch in results for embedding in batch]
+
+    def embed_documents(self, texts):
+        return self.embed_texts([f"{self.embed_instruction}{text}" for text in texts])
+
+    def embed_query(self, text):
+        embed = self._embed_in_slot if self._scheduled() else self._embed_batch
+        return embed([f"{self.query_instruction}{text}"])[0]
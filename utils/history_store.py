@@ -0,0 +1,135 @@
+import sqlite3
+import threading
+import time
+
+import streamlit as st
+
+PAGE_SIZE = 20
+RESTORE_TURNS = 20
+
+
+class HistoryStore:
+    """Chat messages in SQLite, keyed by user and page.
+
+    Same connection setup as the LLM cache (WAL, one connection per
+    thread). Messages are only ever appended, so the autoincrement id is
+    also the order and paging backwards is a range scan on the index.
+    """
+
+    def __init__(self, path="history.db"):
+        self.path = path
+        self.local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chat_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                page TEXT NOT NULL,
+                role TEXT NOT NULL,
+                message TEXT NOT NULL,
+                created REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS chat_history_page ON chat_history (username, page, id)")
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def append(self, username, page, role, message):
+        conn = self._conn()
+        cursor = conn.execute(
+            "INSERT INTO chat_history (username, page, role, message, created) VALUES (?, ?, ?, ?, ?)",
+            (username, page, role, message, time.time()),
+        )
+        conn.commit()
+        return cursor.lastrowid
+
+    def latest(self, username, page, limit, before=None):
+        # before보다 오래된 메시지 중 최근 limit개를 시간 순으로
+        rows = self._conn().execute(
+            "SELECT id, role, message FROM chat_history WHERE username = ? AND page = ? AND id < ? "
+            "ORDER BY id DESC LIMIT ?",
+            (username, page, before if before is not None else 2**63 - 1, limit),
+        ).fetchall()
+        return [{"id": row_id, "role": role, "message": message} for row_id, role, message in reversed(rows)]
+
+    def turns(self, username, page, limit):
+        # 최근 limit개의 질문/답변 쌍 (memory를 다시 채우는 용도), 답이 없는 질문은 버림
+        turns = []
+        question = None
+        for message in self.latest(username, page, limit * 2 + 1):
+            if message["role"] == "human":
+                question = message["message"]
+            elif question is not None:
+                turns.append({"question": question, "answer": message["message"]})
+                question = None
+        return turns[-limit:]
+
+
+@st.cache_resource(show_spinner=False)
+def get_history_store():
+    return HistoryStore("history.db")
+
+
+class ChatHistory:
+    """The messages one page shows, backed by the history store.
+
+    Only the latest `page_size` messages are loaded and painted; older
+    ones are fetched a page at a time by load_older(). Without a logged-in
+    user nothing is written and the history lasts for the session only.
+    """
+
+    def __init__(self, store, username, page, page_size=PAGE_SIZE):
+        self.store = store
+        self.username = username
+        self.page = page
+        self.page_size = page_size
+        self.shown = page_size
+        self.messages = store.latest(username, page, page_size + 1) if username else []
+        self.has_older = len(self.messages) > page_size
+        del self.messages[:-page_size]
+
+    def append(self, message, role):
+        row_id = self.store.append(self.username, self.page, role, message) if self.username else None
+        self.messages.append({"id": row_id, "role": role, "message": message})
+        if self.username and len(self.messages) > self.shown:
+            # 화면에 보이는 만큼만 들고 있음, 나머지는 "load older"로 다시 가져옴
+            del self.messages[: -self.shown]
+            self.has_older = True
+
+    def load_older(self):
+        if not self.messages or not self.username:
+            return
+        older = self.store.latest(self.username, self.page, self.page_size + 1, before=self.messages[0]["id"])
+        self.has_older = len(older) > self.page_size
+        older = older[-self.page_size:]
+        self.messages[:0] = older
+        self.shown += len(older)
+
+    def turns(self, limit=RESTORE_TURNS):
+        return self.store.turns(self.username, self.page, limit) if self.username else []
+
+    def paint_older_button(self):
+        if self.has_older:
+            st.button("Load older messages", key=f"{self.page}_load_older", on_click=self.load_older)
+
+
+def get_chat_history(page, page_size=PAGE_SIZE):
+    # page: 페이지의 메시지 key (예: "groq_messages"), 같은 key를 쓰는 페이지끼리는 기록도 같이 씀
+    # username은 home.py의 streamlit_authenticator 로그인이 session_state에 넣어 둠
+    username = st.session_state.get("username") if st.session_state.get("authentication_status") else None
+    key = f"{page}_history"
+    history = st.session_state.get(key)
+    if history is None or history.username != username:
+        history = ChatHistory(get_history_store(), username, page, page_size=page_size)
+        st.session_state[key] = history
+    return history
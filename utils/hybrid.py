@@ -0,0 +1,215 @@
+import math
+import os
+import pickle
+import re
+import uuid
+
+import numpy as np
+from langchain.schema.runnable import RunnableLambda
+
+from utils.index_store import index_path
+
+# 영문/숫자 식별자(get_chat_model, ABC-1234, v1.2)는 통째로, 한글은 음절 bigram으로
+_TOKEN = re.compile(r"[0-9A-Za-z_]+(?:[.\-][0-9A-Za-z_]+)*|[가-힣]+")
+_PARTS = re.compile(r"[.\-_]")
+
+
+def tokenize(text):
+    tokens = []
+    for token in _TOKEN.findall(text):
+        if "가" <= token[0] <= "힣":
+            if len(token) == 1:
+                tokens.append(token)
+            else:
+                tokens.extend(token[i : i + 2] for i in range(len(token) - 1))
+            continue
+        token = token.lower()
+        tokens.append(token)
+        parts = [part for part in _PARTS.split(token) if part]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class KeywordIndex:
+    """BM25 over an inverted index, keyed by the vector store's docstore ids.
+
+    Each term's postings are turned into (positions, BM25 weight) arrays on
+    first use and kept until the next add/remove, so a lookup only sums
+    precomputed weights for the query terms. Terms found in more than
+    max_df of the chunks are ignored unless nothing else matches.
+    """
+
+    def __init__(self, k1=1.5, b=0.75, max_df=0.5):
+        self.k1 = k1
+        self.b = b
+        self.max_df = max_df
+        self.ids = []
+        self.lengths = []
+        self.postings = {}
+        self._arrays = {}
+        self._norms = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, ids, texts):
+        for id_, text in zip(ids, texts):
+            position = len(self.ids)
+            counts = {}
+            tokens = tokenize(text)
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                self.postings.setdefault(token, ([], []))
+                self.postings[token][0].append(position)
+                self.postings[token][1].append(count)
+            self.ids.append(id_)
+            self.lengths.append(len(tokens))
+        # 문서 수/평균 길이가 바뀌므로 미리 계산한 weight는 모두 다시 계산
+        self._arrays = {}
+        self._norms = None
+
+    def remove(self, ids):
+        removed = set(ids)
+        keep = [position for position, id_ in enumerate(self.ids) if id_ not in removed]
+        renumber = {old: new for new, old in enumerate(keep)}
+        postings = {}
+        for token, (positions, counts) in self.postings.items():
+            kept = [(renumber[p], c) for p, c in zip(positions, counts) if p in renumber]
+            if kept:
+                postings[token] = ([p for p, _ in kept], [c for _, c in kept])
+        self.ids = [self.ids[position] for position in keep]
+        self.lengths = [self.lengths[position] for position in keep]
+        self.postings = postings
+        self._arrays = {}
+        self._norms = None
+
+    def _idf(self, frequency):
+        count = len(self.ids)
+        return math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+
+    def _posting(self, token):
+        if token not in self._arrays:
+            if self._norms is None:
+                lengths = np.array(self.lengths, dtype=np.float32)
+                self._norms = self.k1 * (1 - self.b + self.b * lengths / (float(lengths.mean()) or 1.0))
+            positions, counts = self.postings[token]
+            positions = np.array(positions, dtype=np.int64)
+            counts = np.array(counts, dtype=np.float32)
+            weights = self._idf(len(positions)) * counts * (self.k1 + 1) / (counts + self._norms[positions])
+            self._arrays[token] = (positions, weights)
+        return self._arrays[token]
+
+    def search(self, query, k=20, id_filter=None):
+        # [(docstore id, score)] 점수 순
+        terms = sorted(
+            (token for token in set(tokenize(query)) if token in self.postings),
+            key=lambda token: len(self.postings[token][0]),
+        )
+        common = [t for t in terms if len(self.postings[t][0]) > self.max_df * len(self.ids)]
+        if len(common) < len(terms):
+            terms = terms[: len(terms) - len(common)]
+        bounds = [self._idf(len(self.postings[term][0])) * (self.k1 + 1) for term in terms]
+        candidates = np.empty(0, dtype=np.int64)
+        scores = np.empty(0, dtype=np.float64)
+        for i, term in enumerate(terms):
+            # 드문 단어부터 더함. 이미 찾은 k번째 점수가 남은 단어들의 최대 점수 합보다 크면
+            # 새 문서는 top-k에 들 수 없으므로 남은 단어는 기존 후보에만 더함 (MaxScore)
+            if id_filter is None and len(scores) >= k and np.partition(scores, -k)[-k] > sum(bounds[i:]):
+                for rest in terms[i:]:
+                    positions, weights = self._posting(rest)
+                    found = np.minimum(np.searchsorted(positions, candidates), len(positions) - 1)
+                    match = positions[found] == candidates
+                    scores[match] += weights[found[match]]
+                break
+            positions, weights = self._posting(term)
+            candidates, inverse = np.unique(np.concatenate([candidates, positions]), return_inverse=True)
+            scores = np.bincount(
+                inverse, weights=np.concatenate([scores, weights]), minlength=len(candidates)
+            )
+        if id_filter is None and len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            order = top[np.argsort(-scores[top], kind="stable")]
+        else:
+            order = np.argsort(-scores, kind="stable")
+        results = []
+        for index in order:
+            id_ = self.ids[candidates[index]]
+            if id_filter is not None and not id_filter(id_):
+                continue
+            results.append((id_, float(scores[index])))
+            if len(results) == k:
+                break
+        return results
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore):
+        # 예전 인덱스처럼 keyword index가 없을 때: docstore 텍스트로 다시 만듦 (임베딩 불필요)
+        keywords = cls()
+        ids = [vectorstore.index_to_docstore_id[i] for i in sorted(vectorstore.index_to_docstore_id)]
+        keywords.add(ids, [vectorstore.docstore.search(id_).page_content for id_ in ids])
+        return keywords
+
+
+def keyword_index_path(key):
+    return f"{index_path(key)}/keywords.pkl"
+
+
+def save_keyword_index(keywords, key):
+    path = keyword_index_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump((keywords.ids, keywords.lengths, keywords.postings), f)
+    os.replace(tmp_path, path)
+
+
+def load_keyword_index(key, vectorstore):
+    # 파일이 없거나 벡터 인덱스와 맞지 않으면 docstore에서 다시 만들어 저장
+    path = keyword_index_path(key)
+    if os.path.exists(path):
+        keywords = KeywordIndex()
+        with open(path, "rb") as f:
+            keywords.ids, keywords.lengths, keywords.postings = pickle.load(f)
+        if keywords.ids == [
+            vectorstore.index_to_docstore_id[i] for i in sorted(vectorstore.index_to_docstore_id)
+        ]:
+            return keywords
+    keywords = KeywordIndex.from_vectorstore(vectorstore)
+    save_keyword_index(keywords, key)
+    return keywords
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    scores = {}
+    for ranking in rankings:
+        for rank, id_ in enumerate(ranking):
+            scores[id_] = scores.get(id_, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def hybrid_search(vectorstore, keywords, query, embedding, k=4, fetch_k=20, id_filter=None):
+    # dense(FAISS)와 keyword(BM25) 결과를 각각 fetch_k개씩 가져와 RRF로 합침
+    if vectorstore is None or not vectorstore.index.ntotal:
+        return []
+    vector = np.array([embedding], dtype=np.float32)
+    _, positions = vectorstore.index.search(vector, min(fetch_k, vectorstore.index.ntotal))
+    dense = []
+    for position in positions[0]:
+        if position == -1:
+            continue
+        id_ = vectorstore.index_to_docstore_id[position]
+        if id_filter is None or id_filter(id_):
+            dense.append(id_)
+    lexical = [id_ for id_, _ in keywords.search(query, fetch_k, id_filter)]
+    ids = reciprocal_rank_fusion([dense, lexical])[:k]
+    return [vectorstore.docstore.search(id_) for id_ in ids]
+
+
+def hybrid_retriever(vectorstore, keywords, k=4, fetch_k=20):
+    def search(query):
+        embedding = vectorstore.embedding_function.embed_query(query)
+        return hybrid_search(vectorstore, keywords, query, embedding, k=k, fetch_k=fetch_k)
+
+    return RunnableLambda(search).with_config(run_name="retrieval")
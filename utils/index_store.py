@@ -0,0 +1,169 @@
+import json
+import os
+import pickle
+import shutil
+import uuid
+
+import faiss
+import numpy as np
+from langchain.vectorstores.faiss import FAISS
+
+from utils.doc_cache import CACHE_ROOT
+
+
+INDEX_KINDS = {
+    "Flat": "flat",
+    "IVF-PQ": "ivfpq",
+    "HNSW": "hnsw",
+}
+# 이보다 chunk가 적으면 어떤 종류를 골라도 그냥 Flat (brute force가 더 빠르고 정확)
+ANN_THRESHOLD = 5000
+# IVF-PQ는 k의 이 배수만큼 후보를 찾고 원래 벡터로 다시 정렬 (PQ 거리만으로는 recall@4가 0.4 안팎)
+REFINE_K_FACTOR = 32
+
+
+def _pq_subquantizers(dimension):
+    # PQ의 sub-quantizer 개수는 차원의 약수여야 하고, sub-vector가 너무 작으면 학습이 매우 느림
+    for m in (64, 48, 32, 24, 16, 12, 8, 4, 2):
+        if dimension % m == 0 and dimension // m >= 8:
+            return m
+    return 1
+
+
+def build_faiss_index(vectors, kind="flat"):
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    count, dimension = vectors.shape
+    if kind == "flat":
+        index = faiss.IndexFlatL2(dimension)
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, 32)
+        index.hnsw.efConstruction = 80
+        index.hnsw.efSearch = 64
+    elif kind == "ivfpq":
+        nlist = max(1, min(int(4 * np.sqrt(count)), count // 39))
+        nbits = int(min(8, max(1, np.log2(max(count // 39, 2)))))
+        quantizer = faiss.IndexFlatL2(dimension)
+        ivfpq = faiss.IndexIVFPQ(quantizer, dimension, nlist, _pq_subquantizers(dimension), nbits)
+        ivfpq.train(vectors)
+        ivfpq.nprobe = max(1, nlist // 16)
+        # 원래 벡터도 같이 들고 있으므로 메모리는 Flat보다 조금 더 씀, 빨라지는 것은 후보 검색
+        index = faiss.IndexRefineFlat(ivfpq)
+        index.k_factor = REFINE_K_FACTOR
+    else:
+        raise ValueError(f"Unknown index kind: {kind}")
+    index.add(vectors)
+    return index
+
+
+def faiss_index_kind(index):
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexRefine) or faiss.try_extract_index_ivf(index) is not None:
+        return "ivfpq"
+    return "flat"
+
+
+def upgrade_index(vectorstore, kind, threshold=ANN_THRESHOLD):
+    # chunk 수가 threshold 미만이면 Flat, 넘으면 kind: 지금 인덱스와 다르면 같은 순서로 다시 만듦
+    # (순서가 같아서 index_to_docstore_id는 그대로 사용 가능, 재임베딩 없음)
+    # 이미 원하는 종류면 새 벡터는 그대로 add 되므로 다시 만들 필요 없음
+    index = vectorstore.index
+    target = kind if index.ntotal >= threshold else "flat"
+    if faiss_index_kind(index) == target:
+        return vectorstore
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and not isinstance(index, faiss.IndexRefine):
+        ivf.make_direct_map()
+    vectors = index.reconstruct_n(0, index.ntotal)
+    vectorstore.index = build_faiss_index(vectors, target)
+    return vectorstore
+
+
+def remove_vectors(vectorstore, ids):
+    # Flat은 remove_ids 후 번호가 당겨지므로 FAISS.delete를 그대로 사용
+    if isinstance(vectorstore.index, faiss.IndexFlat):
+        vectorstore.delete(ids)
+        return vectorstore
+    # HNSW는 remove_ids를 지원하지 않고, IVF는 지운 뒤에도 번호가 그대로 남음
+    # -> 남은 벡터를 꺼내서 같은 설정(이미 학습된 상태)의 빈 인덱스에 다시 넣음 (재임베딩 없음)
+    removed = set(ids)
+    keep = [i for i, id_ in sorted(vectorstore.index_to_docstore_id.items()) if id_ not in removed]
+    ivf = faiss.try_extract_index_ivf(vectorstore.index)
+    if ivf is not None:
+        ivf.make_direct_map()
+    vectors = vectorstore.index.reconstruct_batch(np.array(keep, dtype="int64"))
+    index = faiss.clone_index(vectorstore.index)
+    index.reset()
+    if len(keep):
+        index.add(vectors)
+    vectorstore.docstore.delete(list(removed))
+    vectorstore.index = index
+    vectorstore.index_to_docstore_id = {
+        i: vectorstore.index_to_docstore_id[position] for i, position in enumerate(keep)
+    }
+    return vectorstore
+
+
+def index_path(key):
+    return f"{CACHE_ROOT}/indexes/{key}"
+
+
+def has_index(key):
+    path = index_path(key)
+    return os.path.exists(f"{path}/index.faiss") and os.path.exists(f"{path}/index.pkl")
+
+
+def save_index(vectorstore, key, overwrite=False, meta=None):
+    # 임시 폴더에 먼저 저장한 뒤 rename 해서 반쯤 쓰인 인덱스를 읽지 않도록 함
+    # meta(dict)는 같은 폴더에 넣어서 인덱스와 한 번에 바뀜
+    path = index_path(key)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    vectorstore.save_local(tmp_path)
+    if meta is not None:
+        with open(f"{tmp_path}/meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    if overwrite and os.path.exists(path):
+        # 내용이 바뀌는 인덱스(corpus)는 기존 폴더를 치우고 교체
+        old_path = f"{path}.{uuid.uuid4().hex}.old"
+        os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        return
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # 다른 세션이 먼저 같은 인덱스를 저장한 경우
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def load_index_meta(key):
+    path = f"{index_path(key)}/meta.json"
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_index(key, embeddings, mmap=True):
+    path = index_path(key)
+    index = None
+    if mmap:
+        try:
+            index = faiss.read_index(
+                f"{path}/index.faiss", faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+            )
+        except RuntimeError:
+            index = None
+    if index is None:
+        index = faiss.read_index(f"{path}/index.faiss")
+    with open(f"{path}/index.pkl", "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+
+def load_or_build_index(key, embeddings, load_docs):
+    if has_index(key):
+        return load_index(key, embeddings)
+    vectorstore = FAISS.from_documents(load_docs(), embeddings)
+    save_index(vectorstore, key)
+    return vectorstore
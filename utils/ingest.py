@@ -0,0 +1,270 @@
+import queue
+import threading
+import time
+
+import streamlit as st
+from langchain.document_loaders.unstructured import UnstructuredFileLoader
+from langchain.text_splitter import CharacterTextSplitter
+from langchain_community.document_loaders import PyPDFLoader
+from pypdf import PdfReader
+
+from utils.corpus import corpus_sidebar, get_corpus
+from utils.doc_cache import document_key, save_file
+from utils.index_store import ANN_THRESHOLD, INDEX_KINDS
+
+_DONE = object()
+
+
+def iter_pages(file_path):
+    # PDF는 pypdf로 한 페이지씩 읽어서 바로 splitter로 넘김
+    if file_path.lower().endswith(".pdf"):
+        total = len(PdfReader(file_path).pages)
+        return PyPDFLoader(file_path).lazy_load(), total
+    loader = UnstructuredFileLoader(file_path, mode="paged")
+    return loader.lazy_load(), None
+
+
+class IngestJob:
+    """Load -> split -> embed -> add to a Corpus, with the stages overlapped.
+
+    Parsing and splitting run in their own threads and hand work on through
+    bounded queues; the job thread embeds whatever chunks are waiting (up to
+    batch_size) and adds them to the corpus right away, so the document is
+    searchable while the rest of the file is still coming. The corpus is
+    saved once the whole document is in; on failure its chunks are removed.
+    """
+
+    def __init__(
+        self,
+        corpus,
+        doc_id,
+        file_name,
+        load_pages,
+        splitter,
+        batch_size=128,
+        queue_size=16,
+    ):
+        self.corpus = corpus
+        self.doc_id = doc_id
+        self.file_name = file_name
+        self.load_pages = load_pages
+        self.splitter = splitter
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.added = time.time()
+        self.total_pages = None
+        self.pages = 0
+        self.chunks = 0
+        self.started = None
+        self.finished = None
+        self.error = None
+        self.from_cache = False
+        self._stop = threading.Event()
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    @property
+    def chunks_per_second(self):
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        return self.chunks / elapsed if elapsed else 0.0
+
+    @property
+    def fraction(self):
+        if self.done:
+            return 1.0
+        if self.total_pages:
+            return min(self.pages / self.total_pages, 1.0)
+        return 0.0
+
+    def start(self):
+        self.started = time.perf_counter()
+        if not self.corpus.begin(self.doc_id):
+            self.from_cache = True
+            self.finished = time.perf_counter()
+            return self
+        threading.Thread(target=self._run, daemon=True).start()
+        return self
+
+    def _put(self, q, item):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _get(self, q):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _DONE
+
+    def _fail(self, error):
+        if self.error is None:
+            self.error = error
+        self._stop.set()
+
+    def _parse(self, pages_q):
+        try:
+            pages, self.total_pages = self.load_pages()
+            for page in pages:
+                self._put(pages_q, page)
+                if self._stop.is_set():
+                    break
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(pages_q, _DONE)
+
+    def _split(self, pages_q, chunks_q):
+        try:
+            while True:
+                page = self._get(pages_q)
+                if page is _DONE:
+                    break
+                for chunk in self.splitter.split_documents([page]):
+                    self._put(chunks_q, chunk)
+                self.pages += 1
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(chunks_q, _DONE)
+
+    def _add(self, docs):
+        texts = [doc.page_content for doc in docs]
+        metadatas = [
+            {**doc.metadata, "doc_id": self.doc_id, "file_name": self.file_name, "added": self.added}
+            for doc in docs
+        ]
+        vectors = self.corpus.embeddings.embed_documents(texts)
+        self.corpus.add_embeddings(self.doc_id, texts, vectors, metadatas)
+        self.chunks += len(docs)
+
+    def _run(self):
+        pages_q = queue.Queue(self.queue_size)
+        chunks_q = queue.Queue(self.batch_size * 2)
+        threading.Thread(target=self._parse, args=(pages_q,), daemon=True).start()
+        threading.Thread(target=self._split, args=(pages_q, chunks_q), daemon=True).start()
+        try:
+            finished = False
+            while not finished:
+                batch = [self._get(chunks_q)]
+                while len(batch) < self.batch_size and batch[-1] is not _DONE:
+                    try:
+                        batch.append(chunks_q.get_nowait())
+                    except queue.Empty:
+                        break
+                if batch[-1] is _DONE:
+                    batch.pop()
+                    finished = True
+                if batch:
+                    self._add(batch)
+            if self.error is None:
+                self.corpus.commit(self.doc_id)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            if self.error is not None:
+                self.corpus.remove(self.doc_id)
+            self.finished = time.perf_counter()
+
+
+def text_file(file_content, file_path, file_name, model):
+    # 문서 파일: 페이지 단위로 읽고 tiktoken 기준으로 나눔 -> (doc_id, load_pages, splitter)
+    doc_id = document_key(
+        file_content,
+        model,
+        loader="paged",
+        splitter="tiktoken",
+        chunk_size=600,
+        chunk_overlap=100,
+    )
+    splitter = CharacterTextSplitter.from_tiktoken_encoder(
+        separator="\n",
+        chunk_size=600,
+        chunk_overlap=100,
+    )
+    return doc_id, lambda: iter_pages(file_path), splitter
+
+
+def add_file(corpus, file, model, prepare=text_file):
+    # 페이지 단위로 읽고 나누고 임베딩하면서 바로 corpus에 추가 (백그라운드)
+    file_content = file.read()
+    file_path = save_file(file_content, file.name)
+    doc_id, load_pages, splitter = prepare(file_content, file_path, file.name, model)
+    return IngestJob(corpus, doc_id, file.name, load_pages, splitter).start()
+
+
+def add_files(corpus, files, model, prepare=text_file):
+    # 한 번 올린 파일은 같은 corpus에 다시 추가하지 않음 (목록에서 지운 문서가 다시 들어오지 않도록)
+    added = st.session_state.setdefault(f"{corpus.key}_added_files", set())
+    jobs = st.session_state.get("ingest_jobs", [])
+    st.session_state["ingest_jobs"] = [job for job in jobs if not job.done]
+    for file in files or []:
+        if file.file_id in added:
+            continue
+        added.add(file.file_id)
+        st.session_state["ingest_jobs"].append(add_file(corpus, file, model, prepare))
+
+
+def ingest_sidebar(
+    model,
+    prepare=text_file,
+    label="Upload .txt .pdf or .docx files",
+    types=("pdf", "txt", "docx"),
+):
+    # 문서 페이지 공통 sidebar: 업로드 + 인덱스 종류, 올린 파일은 model의 corpus에 추가
+    # (corpus, 검색할 doc_id 목록)을 반환
+    corpus = get_corpus(model)
+    names = list(INDEX_KINDS)
+    key = f"{corpus.key}_index_kind"
+
+    def change_index_kind():
+        # 고른 세션에서만 적용 (다른 세션의 기본값이 설정을 되돌리지 않도록)
+        corpus.set_index_kind(INDEX_KINDS[st.session_state[key]])
+
+    with st.sidebar:
+        files = st.file_uploader(
+            label,
+            type=list(types),
+            accept_multiple_files=True,
+        )
+        st.selectbox(
+            f"Index type (used above {ANN_THRESHOLD} chunks)",
+            names,
+            index=list(INDEX_KINDS.values()).index(corpus.index_kind),
+            key=key,
+            on_change=change_index_kind,
+        )
+    add_files(corpus, files, model, prepare)
+    return corpus, corpus_sidebar(corpus)
+
+
+def show_progress(jobs=None, interval=0.3):
+    # 스크립트 마지막에 호출: 진행 중인 파일이 있으면 모두 끝날 때까지 진행 상황을 갱신
+    # 모두 성공적으로 끝나면 True (문서 목록을 다시 그리도록), jobs를 안 주면 이 세션의 작업
+    if jobs is None:
+        jobs = st.session_state.get("ingest_jobs", [])
+    jobs = [job for job in jobs if not job.from_cache]
+    if not jobs:
+        return False
+    with st.sidebar:
+        bars = [st.progress(job.fraction) for job in jobs]
+        while True:
+            for job, bar in zip(jobs, bars):
+                if job.error is not None:
+                    bar.error(f"{job.file_name}: embedding failed: {job.error}")
+                    continue
+                if job.total_pages:
+                    text = f"{job.pages}/{job.total_pages} pages"
+                else:
+                    text = f"{job.pages} pages"
+                text += f", {job.chunks} chunks, {job.chunks_per_second:.1f} chunks/s"
+                bar.progress(job.fraction, text=f"{job.file_name}: {text}")
+            if all(job.done for job in jobs):
+                return all(job.error is None for job in jobs)
+            time.sleep(interval)
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+import streamlit as st
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+MODEL_PATTERN = re.compile(r"""['"]model(?:_name)?['"](?:, |: )['"]([^'"]+)['"]""")
+
+
+def model_name(llm_string):
+    match = MODEL_PATTERN.search(llm_string)
+    return match.group(1) if match else "default"
+
+
+class BoundedSQLiteCache(BaseCache):
+    """SQLite LLM cache partitioned by model, with an age and size budget.
+
+    Runs in WAL mode with one connection per thread so concurrent sessions
+    don't serialize on the journal. Every `evict_every` writes, rows older
+    than `max_age` seconds are dropped, then least recently used rows until
+    the cached responses fit in `max_bytes`.
+    """
+
+    def __init__(self, path="cache.db", max_bytes=200 * 1024 * 1024, max_age=30 * 24 * 60 * 60, evict_every=50):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.evict_every = evict_every
+        self.local = threading.local()
+        self.stats_lock = threading.Lock()
+        self.stats = defaultdict(lambda: {"hits": 0, "misses": 0, "lookup_seconds": 0.0, "writes": 0})
+        self._writes = 0
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                model TEXT NOT NULL,
+                key TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (model, key)
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed)")
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def _key(self, prompt, llm_string):
+        return hashlib.sha256(f"{llm_string}\x1f{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt, llm_string):
+        started = time.perf_counter()
+        model = model_name(llm_string)
+        key = self._key(prompt, llm_string)
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT response FROM llm_cache WHERE model = ? AND key = ?", (model, key)
+        ).fetchone()
+        if row is not None:
+            conn.execute(
+                "UPDATE llm_cache SET accessed = ? WHERE model = ? AND key = ?",
+                (time.time(), model, key),
+            )
+            conn.commit()
+        elapsed = time.perf_counter() - started
+        with self.stats_lock:
+            stats = self.stats[model]
+            stats["hits" if row is not None else "misses"] += 1
+            stats["lookup_seconds"] += elapsed
+        if row is None:
+            return None
+        return [loads(generation) for generation in json.loads(row[0])]
+
+    def update(self, prompt, llm_string, return_val):
+        model = model_name(llm_string)
+        response = json.dumps([dumps(generation) for generation in return_val])
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (model, key, response, size, created, accessed) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (model, self._key(prompt, llm_string), response, len(response), now, now),
+        )
+        conn.commit()
+        with self.stats_lock:
+            self.stats[model]["writes"] += 1
+            self._writes += 1
+            evict = self._writes % self.evict_every == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        conn = self._conn()
+        removed = conn.execute(
+            "DELETE FROM llm_cache WHERE created < ?", (time.time() - self.max_age,)
+        ).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total > self.max_bytes:
+            # 오래 안 쓴 것부터 예산 안으로 들어올 때까지 삭제
+            cutoff = None
+            freed = 0
+            for accessed, size in conn.execute("SELECT accessed, size FROM llm_cache ORDER BY accessed"):
+                freed += size
+                cutoff = accessed
+                if total - freed <= self.max_bytes:
+                    break
+            removed += conn.execute("DELETE FROM llm_cache WHERE accessed <= ?", (cutoff,)).rowcount
+        conn.commit()
+        return removed
+
+    def clear(self, **kwargs):
+        conn = self._conn()
+        conn.execute("DELETE FROM llm_cache")
+        conn.commit()
+        with self.stats_lock:
+            self.stats.clear()
+
+    def summary(self):
+        rows = self._conn().execute(
+            "SELECT model, COUNT(*), SUM(size), MIN(created), MAX(accessed) FROM llm_cache GROUP BY model"
+        ).fetchall()
+        stored = {row[0]: row[1:] for row in rows}
+        with self.stats_lock:
+            stats = {model: dict(values) for model, values in self.stats.items()}
+        summary = []
+        for model in sorted(set(stored) | set(stats)):
+            entries, size, oldest, last_used = stored.get(model, (0, 0, None, None))
+            values = stats.get(model, {"hits": 0, "misses": 0, "lookup_seconds": 0.0, "writes": 0})
+            lookups = values["hits"] + values["misses"]
+            summary.append(
+                {
+                    "model": model,
+                    "entries": entries,
+                    "size_kb": round((size or 0) / 1024, 1),
+                    "hits": values["hits"],
+                    "misses": values["misses"],
+                    "hit_rate": round(values["hits"] / lookups, 3) if lookups else None,
+                    "avg_lookup_ms": round(values["lookup_seconds"] / lookups * 1000, 3) if lookups else None,
+                    "writes": values["writes"],
+                    "oldest": time.strftime("%Y-%m-%d %H:%M", time.localtime(oldest)) if oldest else None,
+                    "last_used": time.strftime("%Y-%m-%d %H:%M", time.localtime(last_used)) if last_used else None,
+                }
+            )
+        return summary
+
+    def file_size(self):
+        return sum(
+            os.path.getsize(path)
+            for path in (self.path, f"{self.path}-wal", f"{self.path}-shm")
+            if os.path.exists(path)
+        )
+
+
+@st.cache_resource(show_spinner=False)
+def get_llm_cache():
+    return BoundedSQLiteCache("cache.db")
@@ -0,0 +1,280 @@
+import threading
+from collections import deque
+
+import faiss
+import numpy as np
+import streamlit as st
+from langchain.prompts import ChatPromptTemplate
+from langchain.schema import AIMessage, HumanMessage, SystemMessage
+
+from utils.async_runner import run_in_background
+from utils.clients import get_chat_model
+from utils.context import count_tokens
+from utils.metrics import stage
+
+SUMMARY_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """
+            You keep the long-term memory of a conversation between a user and an AI assistant.
+            Merge the new lines into the current summary. Keep names, numbers, code identifiers,
+            decisions and open questions; drop small talk. Write in the language of the conversation,
+            at most {max_words} words. Reply with the summary only.
+            """,
+        ),
+        ("human", "Current summary:\n{summary}\n\nNew lines:\n{lines}"),
+    ]
+)
+
+
+class SessionMemory:
+    """Conversation buffer that lives in st.session_state across reruns.
+
+    Only new turns are appended and each message's token count is kept,
+    so pruning never has to re-count the whole buffer. With a summarizer,
+    pruned turns are not lost: they stay in the history verbatim until a
+    background call has folded them into a rolling summary, which is then
+    sent ahead of the recent turns. If summarizing keeps failing, the
+    oldest of them are dropped once they exceed the buffer's own limit
+    (max_token_limit or k turns). With `recall` embeddings, every Q/A
+    pair also goes into a small per-session FAISS index and the
+    `recall_k` older turns closest to the new question (up to
+    `recall_tokens`) are sent as well.
+    """
+
+    def __init__(
+        self,
+        llm,
+        max_token_limit=None,
+        k=None,
+        summarizer=None,
+        max_summary_words=150,
+        recall=None,
+        recall_k=3,
+        recall_tokens=1000,
+    ):
+        self.llm = llm
+        self.max_token_limit = max_token_limit
+        self.k = k
+        self.summarizer = summarizer
+        self.max_summary_words = max_summary_words
+        self.recall = recall
+        self.recall_k = recall_k
+        self.recall_tokens = recall_tokens
+        self.messages = deque()
+        self.message_turns = deque()
+        self.token_counts = deque()
+        self.total_tokens = 0
+        self.turns = 0
+        self.summary = ""
+        self.summary_tokens = 0
+        self.evicted = []
+        self.evicted_turns = []
+        self.evicted_counts = []
+        self.evicted_tokens = 0
+        # 지금까지 evicted에서 빠진 메시지 수 (요약됐거나 버려진 것), 요약 결과를 맞춰 자르는 데 씀
+        self.evicted_start = 0
+        self.summarizing = None
+        self.pairs = []
+        self.turn_index = None
+        self.indexed_turns = []
+        self.lock = threading.Lock()
+
+    def _count_tokens(self, message):
+        if self.max_token_limit is None:
+            return 0
+        return self.llm.get_num_tokens_from_messages([message])
+
+    def _append(self, message):
+        count = self._count_tokens(message)
+        self.messages.append(message)
+        self.message_turns.append(self.turns)
+        self.token_counts.append(count)
+        self.total_tokens += count
+
+    def _pop(self):
+        message = self.messages.popleft()
+        turn = self.message_turns.popleft()
+        count = self.token_counts.popleft()
+        self.total_tokens -= count
+        if self.summarizer is not None:
+            self.evicted.append(message)
+            self.evicted_turns.append(turn)
+            self.evicted_counts.append(count)
+            self.evicted_tokens += count
+
+    def _drop_evicted(self, count):
+        del self.evicted[:count]
+        del self.evicted_turns[:count]
+        del self.evicted_counts[:count]
+        self.evicted_tokens = sum(self.evicted_counts)
+        self.evicted_start += count
+
+    def _over_evicted_limit(self):
+        if self.max_token_limit is not None and self.evicted_tokens > self.max_token_limit:
+            return True
+        return self.k is not None and len(self.evicted) > self.k * 2
+
+    def _cap_evicted(self):
+        # 요약이 계속 실패해도 history가 끝없이 커지지 않도록 가장 오래된 turn부터 통째로 버림
+        # (recall이 있으면 세션 index에서 다시 찾아올 수 있음)
+        while self.evicted and self._over_evicted_limit():
+            first = self.evicted_turns[0]
+            count = 1
+            while count < len(self.evicted) and self.evicted_turns[count] == first:
+                count += 1
+            self._drop_evicted(count)
+
+    def _prune(self):
+        if self.k is not None:
+            while len(self.messages) > self.k * 2:
+                self._pop()
+        if self.max_token_limit is not None:
+            while self.messages and self.total_tokens > self.max_token_limit:
+                self._pop()
+        self._cap_evicted()
+
+    def save_context(self, inputs, outputs):
+        self._append(HumanMessage(content=inputs["input"]))
+        self._append(AIMessage(content=outputs["output"]))
+        self.pairs.append((inputs["input"], outputs["output"]))
+        self.turns += 1
+        self._prune()
+
+    def sync(self, chat_summary):
+        # chat_summary only ever grows, so everything past self.turns is new
+        with self.lock:
+            for chat_list in chat_summary[self.turns:]:
+                self.save_context(
+                    {"input": chat_list["question"]},
+                    {"output": chat_list["answer"]},
+                )
+        self._index_turns()
+        self.refresh_summary()
+
+    def _embed(self, vectors):
+        vectors = np.asarray(vectors, dtype="float32")
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    def _index_turns(self):
+        # 새 Q/A 쌍을 세션 FAISS index에 추가 (답변이 끝난 뒤라 응답 시간에는 안 들어감)
+        if self.recall is None:
+            return
+        with self.lock:
+            start = self.indexed_turns[-1] + 1 if self.indexed_turns else 0
+            new = list(enumerate(self.pairs[start:], start))
+        if not new:
+            return
+        # 질문과 답변을 따로 embedding: 긴 답변에 묻혀 질문 속 내용이 안 찾아지는 일이 없도록
+        vectors = self._embed(self.recall.embed_documents([text for _, pair in new for text in pair]))
+        with self.lock:
+            if self.turn_index is None:
+                self.turn_index = faiss.IndexFlatIP(vectors.shape[1])
+            self.turn_index.add(vectors)
+            self.indexed_turns.extend(turn for turn, _ in new for _ in range(2))
+
+    def _first_verbatim_turn(self):
+        if self.evicted_turns:
+            return self.evicted_turns[0]
+        return self.message_turns[0] if self.message_turns else self.turns
+
+    def _recalled(self, query):
+        # verbatim으로 들어가는 turn보다 오래된 것 중 질문과 가까운 turn을 시간 순으로
+        if self.recall is None or self.turn_index is None or not query:
+            return []
+        before = self._first_verbatim_turn()
+        if not any(turn < before for turn in self.indexed_turns):
+            return []
+        vector = self._embed([self.recall.embed_query(query)])
+        with self.lock:
+            # 세션 하나의 turn 수라 전부 점수를 매겨도 충분히 빠름
+            _, rows = self.turn_index.search(vector, self.turn_index.ntotal)
+            turns = [self.indexed_turns[row] for row in rows[0] if row >= 0]
+        chosen, used = [], 0
+        for turn in turns:
+            if turn >= before or turn in chosen:
+                continue
+            question, answer = self.pairs[turn]
+            tokens = count_tokens(question) + count_tokens(answer)
+            if used + tokens > self.recall_tokens:
+                continue
+            chosen.append(turn)
+            used += tokens
+            if len(chosen) == self.recall_k:
+                break
+        messages = []
+        for turn in sorted(chosen):
+            question, answer = self.pairs[turn]
+            messages += [HumanMessage(content=question), AIMessage(content=answer)]
+        return messages
+
+    @property
+    def history_tokens(self):
+        # 이번 프롬프트에 실제로 들어가는 history 크기 (요약 + 아직 요약 안 된 turn + 최근 turn)
+        return self.summary_tokens + self.evicted_tokens + self.total_tokens
+
+    def refresh_summary(self):
+        # 잘려 나간 turn을 백그라운드에서 요약에 합침, 한 번에 하나만
+        with self.lock:
+            if self.summarizer is None or self.summarizing is not None or not self.evicted:
+                return
+            backend, model = self.summarizer
+            messages = list(self.evicted)
+            summary = self.summary
+            end = self.evicted_start + len(messages)
+        lines = "\n".join(
+            f"{'User' if isinstance(message, HumanMessage) else 'AI'}: {message.content}" for message in messages
+        )
+        chain = SUMMARY_PROMPT | get_chat_model(backend, model)
+        self.summarizing = run_in_background(
+            chain,
+            {"summary": summary or "(none)", "lines": lines, "max_words": self.max_summary_words},
+            model=model if backend == "ollama" else None,
+            page="memory_summary",
+        )
+        self.summarizing.add_done_callback(lambda future: self._summary_done(future, end))
+
+    def _summary_done(self, future, end):
+        # event loop 스레드에서 불림: 실패하면 evicted를 그대로 두고 다음 sync 때 다시 시도
+        # end: 요약한 마지막 메시지 다음 위치, 그 사이 _cap_evicted가 버린 만큼은 이미 빠져 있음
+        with self.lock:
+            self.summarizing = None
+            if future.cancelled() or future.exception() is not None:
+                return
+            summary = future.result().content.strip()
+            self._drop_evicted(max(end - self.evicted_start, 0))
+            self.summary = summary
+            self.summary_tokens = self._count_tokens(SystemMessage(content=summary))
+
+    def load_memory_variables(self, inputs):
+        # inputs: 체인 입력 ({"question": ...} 또는 질문 문자열), recall 검색어로 씀
+        query = inputs.get("question") if isinstance(inputs, dict) else inputs
+        recalled = self._recalled(query)
+        with self.lock:
+            history = []
+            if self.summary:
+                history.append(SystemMessage(content=f"Summary of the earlier conversation:\n{self.summary}"))
+            history.extend(recalled)
+            history.extend(self.evicted)
+            history.extend(self.messages)
+        return {"history": history}
+
+
+def get_session_memory(summary_key, llm, max_token_limit=None, k=None, summarizer=None, recall=None):
+    # summarizer: 오래된 turn을 요약할 (backend, model), 보통 같은 backend의 싼 모델
+    # recall: 예전 turn을 질문으로 찾아올 embeddings
+    memory_key = f"{summary_key}_memory"
+    memory = st.session_state.get(memory_key)
+    if memory is None or len(st.session_state.get(summary_key, [])) < memory.turns:
+        memory = SessionMemory(llm, max_token_limit=max_token_limit, k=k, summarizer=summarizer, recall=recall)
+        st.session_state[memory_key] = memory
+    memory.llm = llm
+    memory.summarizer = summarizer
+    if memory.recall is not recall:
+        # 다른 embeddings로 바뀌면 (같은 key를 쓰는 페이지끼리) index를 처음부터 다시 만듦
+        memory.recall, memory.turn_index, memory.indexed_turns = recall, None, []
+    with stage("memory"):
+        memory.sync(st.session_state.get(summary_key, []))
+    return memory
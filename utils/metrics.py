@@ -0,0 +1,199 @@
+import asyncio
+import contextlib
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+import streamlit as st
+from langchain.callbacks.base import AsyncCallbackHandler
+
+from utils.context import count_tokens
+
+METRICS_DIR = "metrics"
+# 체인 안 run 이름 -> 단계 이름 (retriever는 run_name="retrieval"로 이름을 붙여 둠)
+STAGES = {
+    "retrieval": "retrieval",
+    "format_docs": "context",
+    "load_memory": "memory",
+    "ChatPromptTemplate": "prompt",
+}
+FIELDS = ["total", "queue", "retrieval", "context", "memory", "prompt", "first_token", "llm", "tokens_per_s"]
+
+
+class MetricsStore:
+    """Chain metrics as JSON lines, one file per day, kept for `keep_days`."""
+
+    def __init__(self, path=METRICS_DIR, keep_days=14):
+        self.path = path
+        self.keep_days = keep_days
+        self.lock = threading.Lock()
+        self._current = None
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, day):
+        return os.path.join(self.path, f"metrics-{day:%Y%m%d}.jsonl")
+
+    def _rotate(self):
+        cutoff = self._file(datetime.now() - timedelta(days=self.keep_days))
+        for path in glob.glob(os.path.join(self.path, "metrics-*.jsonl")):
+            if path < cutoff:
+                os.remove(path)
+
+    def record(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        with self.lock:
+            path = self._file(datetime.now())
+            if path != self._current:
+                # 날짜가 바뀌면 새 파일, 오래된 파일은 정리
+                self._current = path
+                self._rotate()
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def load(self, seconds=24 * 60 * 60):
+        since = time.time() - seconds
+        first = self._file(datetime.fromtimestamp(since))
+        records = []
+        for path in sorted(glob.glob(os.path.join(self.path, "metrics-*.jsonl"))):
+            if path < first:
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # 쓰는 중이던 마지막 줄
+                    if record["time"] >= since:
+                        records.append(record)
+        return records
+
+
+@st.cache_resource(show_spinner=False)
+def get_metrics_store():
+    return MetricsStore()
+
+
+def summarize(records, by):
+    # by(model/page)별 요청 수와 각 지표의 p50/p95
+    groups = defaultdict(list)
+    for record in records:
+        groups[record.get(by) or "unknown"].append(record)
+    rows = []
+    for key, group in sorted(groups.items(), key=lambda item: -len(item[1])):
+        row = {
+            by: key,
+            "requests": len(group),
+            "cache hits": sum(1 for record in group if record.get("cached")),
+            "errors": sum(1 for record in group if record.get("error")),
+        }
+        for field in FIELDS:
+            values = [record[field] for record in group if record.get(field) is not None]
+            if values:
+                row[f"{field} p50"], row[f"{field} p95"] = np.percentile(values, [50, 95])
+        rows.append(row)
+    return rows
+
+
+@contextlib.contextmanager
+def stage(name):
+    # 체인 밖(스크립트 스레드)에서 재는 단계: 이번 실행의 다음 start_chain 기록에 합쳐짐
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        st.session_state.setdefault("pending_stages", {})[name] = time.perf_counter() - started
+
+
+def pop_stages():
+    return st.session_state.pop("pending_stages", {})
+
+
+class MetricsCallback(AsyncCallbackHandler):
+    """Times the stages of one chain call and stores a record when it ends.
+
+    Stages are the named runs in STAGES plus whatever was measured with
+    stage() before the call. first_token is what the user waits for: the
+    scheduler queue plus the chain up to the first streamed token.
+    """
+
+    def __init__(self, store, page, stages=None):
+        self.store = store
+        self.page = page
+        self.stages = dict(stages or {})
+        self.queue = None
+        self.root = None
+        self.runs = {}
+        self.model = None
+        self.llm_started = self.first_token = self.llm_ended = None
+        self.prompt_tokens = None
+        self.output_tokens = 0
+        self.tokens_per_s = None
+
+    async def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        now = time.perf_counter()
+        if parent_run_id is None and self.root is None:
+            self.root = (run_id, now)
+        name = STAGES.get(kwargs.get("name"))
+        if name is not None:
+            self.runs[run_id] = (name, now)
+
+    async def on_chain_end(self, outputs, *, run_id, **kwargs):
+        await self._end(run_id)
+
+    async def on_chain_error(self, error, *, run_id, **kwargs):
+        await self._end(run_id, error)
+
+    async def _end(self, run_id, error=None):
+        now = time.perf_counter()
+        if run_id in self.runs:
+            name, started = self.runs.pop(run_id)
+            self.stages[name] = self.stages.get(name, 0.0) + now - started
+        if self.root is not None and run_id == self.root[0]:
+            await asyncio.to_thread(self.store.record, self._record(now, error))
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        params = kwargs.get("invocation_params") or {}
+        self.model = params.get("model") or params.get("model_name")
+        self.llm_started = time.perf_counter()
+        self.prompt_tokens = sum(count_tokens(m.content) for m in messages[0] if isinstance(m.content, str))
+
+    async def on_llm_new_token(self, token, **kwargs):
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+        self.output_tokens += 1
+
+    async def on_llm_end(self, response, **kwargs):
+        self.llm_ended = time.perf_counter()
+        info = response.generations[0][0].generation_info or {}
+        # Ollama가 알려주는 실제 토큰 수와 생성 시간이 있으면 그걸 씀
+        self.prompt_tokens = info.get("prompt_eval_count", self.prompt_tokens)
+        self.output_tokens = info.get("eval_count", self.output_tokens)
+        if info.get("eval_duration"):
+            self.tokens_per_s = self.output_tokens / (info["eval_duration"] / 1e9)
+        elif self.first_token is not None and self.llm_ended > self.first_token and self.output_tokens > 1:
+            self.tokens_per_s = self.output_tokens / (self.llm_ended - self.first_token)
+
+    def _record(self, now, error=None):
+        started = self.root[1]
+        return {
+            "time": time.time(),
+            "page": self.page,
+            "model": self.model,
+            "cached": self.llm_ended is not None and self.first_token is None,
+            "error": repr(error) if error is not None else None,
+            "total": now - started + (self.queue or 0.0),
+            "queue": self.queue,
+            **{name: self.stages.get(name) for name in ("retrieval", "context", "memory", "prompt")},
+            "first_token": (
+                self.first_token - started + (self.queue or 0.0) if self.first_token is not None else None
+            ),
+            "llm": self.llm_ended - self.llm_started if self.llm_ended is not None else None,
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "tokens_per_s": self.tokens_per_s,
+        }
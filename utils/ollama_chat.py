@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import weakref
+
+import aiohttp
+import requests
+from langchain_community.chat_models import ChatOllama
+from langchain_community.llms.ollama import OllamaEndpointNotFoundError
+from requests.adapters import HTTPAdapter
+
+# 모든 PooledChatOllama가 같이 쓰는 연결 (ChatOllama는 요청마다 새 연결/세션을 만듦)
+# 동시에 도는 요청은 scheduler가 모델당 몇 개로 묶어 두므로 pool은 작아도 충분
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=8)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+# aiohttp 세션은 만든 event loop에서만 쓸 수 있으므로 loop마다 하나 (앱에서는 공유 loop 하나)
+_async_sessions = weakref.WeakKeyDictionary()
+_async_lock = threading.Lock()
+
+
+def _async_session():
+    loop = asyncio.get_running_loop()
+    with _async_lock:
+        session = _async_sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession()
+            _async_sessions[loop] = session
+        return session
+
+
+class PooledChatOllama(ChatOllama):
+    """ChatOllama that keeps its HTTP connections open between requests.
+
+    The requests are the same as ChatOllama's; only the transport differs:
+    the sync path goes through one process-wide requests.Session and the
+    async path through one aiohttp.ClientSession per event loop, so a chat
+    turn doesn't pay for a new TCP connection (and, async, a new session).
+    """
+
+    def _request_payload(self, payload, stop, **kwargs):
+        # ChatOllama._create_stream과 같은 방식으로 옵션/stop을 채움
+        if self.stop is not None and stop is not None:
+            raise ValueError("`stop` found in both the input and default params.")
+        elif self.stop is not None:
+            stop = self.stop
+        params = self._default_params
+        for key in self._default_params:
+            if key in kwargs:
+                params[key] = kwargs[key]
+        if "options" in kwargs:
+            params["options"] = kwargs["options"]
+        else:
+            params["options"] = {
+                **params["options"],
+                "stop": stop,
+                **{k: v for k, v in kwargs.items() if k not in self._default_params},
+            }
+        if payload.get("messages"):
+            return {"messages": payload.get("messages", []), **params}
+        return {"prompt": payload.get("prompt"), "images": payload.get("images", []), **params}
+
+    def _request_headers(self):
+        return {
+            "Content-Type": "application/json",
+            **(self.headers if isinstance(self.headers, dict) else {}),
+        }
+
+    def _create_stream(self, api_url, payload, stop=None, **kwargs):
+        response = _session.post(
+            url=api_url,
+            headers=self._request_headers(),
+            json=self._request_payload(payload, stop, **kwargs),
+            stream=True,
+            timeout=self.timeout,
+        )
+        response.encoding = "utf-8"
+        if response.status_code != 200:
+            if response.status_code == 404:
+                raise OllamaEndpointNotFoundError(
+                    "Ollama call failed with status code 404. "
+                    "Maybe your model is not found "
+                    f"and you should pull the model with `ollama pull {self.model}`."
+                )
+            raise ValueError(
+                f"Ollama call failed with status code {response.status_code}. Details: {response.text}"
+            )
+        return response.iter_lines(decode_unicode=True)
+
+    async def _acreate_stream(self, api_url, payload, stop=None, **kwargs):
+        session = _async_session()
+        async with session.post(
+            url=api_url,
+            headers=self._request_headers(),
+            json=self._request_payload(payload, stop, **kwargs),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        ) as response:
+            if response.status != 200:
+                if response.status == 404:
+                    raise OllamaEndpointNotFoundError("Ollama call failed with status code 404.")
+                detail = await response.text()
+                raise ValueError(f"Ollama call failed with status code {response.status}. Details: {detail}")
+            async for line in response.content:
+                yield line.decode("utf-8")
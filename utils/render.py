@@ -0,0 +1,80 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+from markdown_it import MarkdownIt
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+from pygments.util import ClassNotFound
+
+# 인라인 스타일로 색을 넣음 (st.html에는 페이지 CSS가 없으므로)
+FORMATTER = HtmlFormatter(noclasses=True, nowrap=True, style="friendly")
+PRE_STYLE = "background: #f6f8fa; padding: 0.75em 1em; border-radius: 0.5rem; overflow-x: auto;"
+LEXERS = {}
+
+
+def _lexer(lang):
+    if lang not in LEXERS:
+        try:
+            LEXERS[lang] = get_lexer_by_name(lang)
+        except ClassNotFound:
+            LEXERS[lang] = None
+    return LEXERS[lang]
+
+
+def _highlight(code, lang, attrs):
+    # markdown-it은 "<pre"로 시작하는 결과를 그대로 쓰고, 아니면 escape해서 <pre><code>로 감쌈
+    lexer = _lexer(lang.lower()) if lang else None
+    if lexer is None:
+        return ""
+    return f'<pre style="{PRE_STYLE}"><code>{highlight(code, lexer, FORMATTER)}</code></pre>\n'
+
+
+class MessageRenderer:
+    """Chat messages rendered to HTML once and kept by content hash.
+
+    Markdown goes through markdown-it with raw HTML disabled (tags in a
+    message are escaped and javascript: links are not turned into links),
+    so the result is safe to hand to st.html; the browser sanitizes it
+    again. With `code=True` fenced blocks are highlighted by Pygments.
+    The least recently used renders are dropped past `max_entries`.
+    """
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.markdown = MarkdownIt("commonmark", {"html": False}).enable(["table", "strikethrough"])
+        self.code_markdown = MarkdownIt("commonmark", {"html": False, "highlight": _highlight}).enable(
+            ["table", "strikethrough"]
+        )
+
+    def render(self, text, code=False):
+        key = hashlib.sha1(f"{int(code)}\x1f{text}".encode("utf-8")).digest()
+        with self.lock:
+            html = self.entries.get(key)
+            if html is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+        html = (self.code_markdown if code else self.markdown).render(text)
+        with self.lock:
+            self.entries[key] = html
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return html
+
+
+@st.cache_resource(show_spinner=False)
+def get_message_renderer():
+    # 프로세스 전체에서 하나: 재접속이나 같은 답을 보는 다른 세션도 다시 파싱하지 않음
+    return MessageRenderer()
+
+
+def render_message(text, code=False):
+    return get_message_renderer().render(text, code=code)
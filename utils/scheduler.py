@@ -0,0 +1,143 @@
+import asyncio
+import contextlib
+import contextvars
+import itertools
+import threading
+import time
+from collections import deque
+
+import streamlit as st
+
+# 지금 실행 중인 코드가 들고 있는 slot의 모델 (to_thread/run_in_executor로 넘어간 thread에도 이어짐)
+held_slot = contextvars.ContextVar("held_slot", default=None)
+
+
+@st.cache_resource(show_spinner=False)
+def get_event_loop():
+    # 모든 세션이 같이 쓰는 event loop 하나를 백그라운드 스레드에서 계속 돌림
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+
+class Ticket:
+    def __init__(self, model, number):
+        self.model = model
+        self.number = number
+        self.created = time.perf_counter()
+        self.granted = None
+        self.event = asyncio.Event()
+
+    @property
+    def waited(self):
+        return (self.granted or time.perf_counter()) - self.created
+
+
+class OllamaScheduler:
+    """Admission control in front of one Ollama server, on the shared loop.
+
+    At most `max_concurrent` requests per model run at once and only one
+    model is served at a time, so Ollama never has to swap models while a
+    request is in flight. Waiting requests for the loaded model go first,
+    up to `max_batch` in a row while other models are waiting; then the
+    model whose oldest request has waited longest gets its turn.
+    """
+
+    def __init__(self, max_concurrent=2, max_batch=8):
+        self.max_concurrent = max_concurrent
+        self.max_batch = max_batch
+        self.queues = {}
+        self.running = {}
+        self.active = None
+        self.batch = 0
+        self.switches = 0
+        self.lock = threading.Lock()
+        self._numbers = itertools.count()
+
+    def _oldest_model(self, exclude=None):
+        waiting = [(queue[0].number, model) for model, queue in self.queues.items() if queue and model != exclude]
+        return min(waiting)[1] if waiting else None
+
+    def _dispatch(self):
+        while True:
+            if self.active is None or (
+                not self.queues.get(self.active) and not self.running.get(self.active)
+            ):
+                model = self._oldest_model()
+                if model is None:
+                    self.active = None
+                    return
+                if model != self.active:
+                    self.active, self.batch = model, 0
+                    self.switches += 1
+            queue = self.queues.get(self.active)
+            others = self._oldest_model(exclude=self.active)
+            if (
+                queue
+                and self.running.get(self.active, 0) < self.max_concurrent
+                and (self.batch < self.max_batch or others is None)
+            ):
+                ticket = queue.popleft()
+                ticket.granted = time.perf_counter()
+                self.running[self.active] = self.running.get(self.active, 0) + 1
+                self.batch += 1
+                ticket.event.set()
+                continue
+            if others is not None and not self.running.get(self.active):
+                # 지금 모델은 다 끝났고 다른 모델이 기다리는 중 -> 교체
+                self.active, self.batch = others, 0
+                self.switches += 1
+                continue
+            return
+
+    @contextlib.asynccontextmanager
+    async def slot(self, model, on_ticket=None):
+        ticket = Ticket(model, next(self._numbers))
+        with self.lock:
+            self.queues.setdefault(model, deque()).append(ticket)
+            self._dispatch()
+        if on_ticket is not None:
+            on_ticket(ticket)
+        held = None
+        try:
+            await ticket.event.wait()
+            held = held_slot.set(model)
+            yield ticket
+        finally:
+            if held is not None:
+                held_slot.reset(held)
+            with self.lock:
+                if ticket.granted is None:
+                    self.queues[model].remove(ticket)
+                else:
+                    self.running[model] -= 1
+                self._dispatch()
+
+    def position(self, ticket):
+        # 이 요청보다 먼저 처리될 대기 요청 수 (UI 표시용 근사치)
+        with self.lock:
+            if ticket.granted is not None:
+                return 0
+            ahead = sum(1 for other in self.queues[ticket.model] if other.number < ticket.number)
+            if ticket.model != self.active:
+                ahead += len(self.queues.get(self.active, ()))
+            return ahead
+
+    def idle(self):
+        with self.lock:
+            return not any(self.running.values()) and not any(self.queues.values())
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "active": self.active,
+                "running": dict(self.running),
+                "waiting": {model: len(queue) for model, queue in self.queues.items() if queue},
+                "switches": self.switches,
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_scheduler():
+    # 프로세스 전체에서 하나: 모든 세션의 Ollama 요청이 같은 대기열을 거침
+    return OllamaScheduler()
@@ -0,0 +1,107 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import streamlit as st
+
+from utils.clients import get_ollama_embeddings
+
+
+def normalize_prompt(text):
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def cache_namespace(*parts):
+    # 모델, 페이지, 시스템 프롬프트(공백/대소문자 정규화) 등이 모두 같을 때만 답을 재사용
+    joined = "\x1f".join(normalize_prompt(str(part)) for part in parts)
+    return hashlib.sha1(joined.encode("utf-8")).hexdigest()
+
+
+class SemanticCache:
+    """Answers keyed by the embedded question, matched by cosine similarity.
+
+    Entries expire after `ttl` seconds and the least recently used ones are
+    dropped once there are more than `max_entries`.
+    """
+
+    def __init__(self, embeddings, threshold=0.95, ttl=24 * 60 * 60, max_entries=500):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._next_id = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _embed(self, question):
+        vector = np.asarray(self.embeddings.embed_query(question), dtype="float32")
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self):
+        now = time.time()
+        for entry_id in [i for i, e in self.entries.items() if now - e["created"] > self.ttl]:
+            del self.entries[entry_id]
+
+    def lookup(self, question, namespace, threshold=None):
+        """Returns (answer or None, question vector to pass to update())."""
+        threshold = self.threshold if threshold is None else threshold
+        vector = self._embed(question)
+        with self.lock:
+            self._expire()
+            candidates = [
+                (entry_id, entry)
+                for entry_id, entry in self.entries.items()
+                if entry["namespace"] == namespace and entry["vector"].shape == vector.shape
+            ]
+            if candidates:
+                scores = np.stack([entry["vector"] for _, entry in candidates]) @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= threshold:
+                    entry_id, entry = candidates[best]
+                    self.entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return entry["answer"], vector
+            self.misses += 1
+        return None, vector
+
+    def update(self, namespace, vector, answer):
+        with self.lock:
+            self.entries[self._next_id] = {
+                "namespace": namespace,
+                "vector": vector,
+                "answer": answer,
+                "created": time.time(),
+            }
+            self._next_id += 1
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+@st.cache_resource(show_spinner=False)
+def get_semantic_cache(embedding_model):
+    return SemanticCache(get_ollama_embeddings(embedding_model))
+
+
+def semantic_cache_sidebar(embedding_model):
+    # 사이드바에서 켜고 끄는 옵션 (기본은 꺼짐). 켜져 있으면 캐시를, 아니면 None을 돌려줌
+    enabled = st.checkbox("Reuse answers to similar questions", value=False)
+    if not enabled:
+        return None, None
+    threshold = st.slider("Similarity threshold", 0.80, 1.00, 0.95, 0.01)
+    cache = get_semantic_cache(embedding_model)
+    st.caption(
+        f"Semantic cache: {cache.hits} hits / {cache.misses} misses "
+        f"({cache.hit_rate:.0%}), {len(cache.entries)} answers"
+    )
+    return cache, threshold
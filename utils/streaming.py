@@ -0,0 +1,36 @@
+import time
+
+
+class StreamRenderer:
+    """Coalesces streamed tokens into periodic markdown updates.
+
+    A flush happens when `interval` seconds have passed since the last one
+    or `max_tokens` tokens are pending; close() always flushes the rest.
+    """
+
+    def __init__(self, placeholder, interval=0.05, max_tokens=64):
+        self.placeholder = placeholder
+        self.interval = interval
+        self.max_tokens = max_tokens
+        self.message = ""
+        self.pending = []
+        self.last_flush = 0.0
+
+    def write(self, token):
+        self.pending.append(token)
+        if (
+            len(self.pending) >= self.max_tokens
+            or time.perf_counter() - self.last_flush >= self.interval
+        ):
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.message += "".join(self.pending)
+            self.pending = []
+            self.placeholder.markdown(self.message)
+        self.last_flush = time.perf_counter()
+
+    def close(self):
+        self.flush()
+        return self.message
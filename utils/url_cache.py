@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+import time
+
+import requests
+
+from utils.doc_cache import CACHE_ROOT, content_hash, save_file
+
+session = requests.Session()
+
+
+def _meta_path(url):
+    return f"{CACHE_ROOT}/urls/{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+
+def _write_meta(url, meta):
+    path = _meta_path(url)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+def fetch_url(url, file_name="document.pdf", max_age=300):
+    """Download url into the content-addressed file cache.
+
+    Returns {"path", "hash", ...}. Within max_age seconds of the last check
+    the cached copy is used as is; after that the server is asked with
+    If-None-Match / If-Modified-Since and the file is only downloaded again
+    if it changed.
+    """
+    meta = None
+    meta_path = _meta_path(url)
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if not os.path.exists(meta["path"]):
+            meta = None
+
+    if meta is not None and time.time() - meta["checked"] < max_age:
+        return meta
+
+    headers = {}
+    if meta is not None:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        response = session.get(url, headers=headers, timeout=60)
+    except requests.exceptions.RequestException:
+        # 서버에 연결이 안 되면 예전에 받아 둔 파일로 계속 진행
+        if meta is not None:
+            return meta
+        raise
+
+    if response.status_code == 304 and meta is not None:
+        meta["checked"] = time.time()
+        _write_meta(url, meta)
+        return meta
+
+    response.raise_for_status()
+    content = response.content
+    meta = {
+        "url": url,
+        "path": save_file(content, file_name),
+        "hash": content_hash(content),
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "checked": time.time(),
+    }
+    _write_meta(url, meta)
+    return meta
@@ -0,0 +1,169 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+import streamlit as st
+
+from utils.scheduler import get_event_loop, get_scheduler
+
+OLLAMA_BASE_URL = "http://localhost:11434"
+# 페이지에서 쓰는 Ollama 모델 (앞에 있을수록 먼저 올림)
+PAGE_MODELS = ["llama3.1:latest", "phi3:3.8b", "codegemma", "llama3:latest"]
+
+
+def model_tag(model):
+    # /api/ps는 태그를 붙여서 알려줌: "codegemma" -> "codegemma:latest"
+    return model if ":" in model else f"{model}:latest"
+
+
+class ModelWarmer:
+    """Keeps the Ollama models people are using loaded.
+
+    Every request is recorded, and when it finishes the model's keep_alive
+    is set from the traffic of the last `window` seconds: Ollama's default
+    of 5 minutes plus 2 minutes per request, up to 2 hours. Loads and
+    keep_alive refreshes go through the scheduler (a refresh runs in the
+    slot of the request it follows), so warming a model never swaps out one
+    that is answering.
+    """
+
+    def __init__(
+        self,
+        scheduler,
+        loop,
+        base_url=OLLAMA_BASE_URL,
+        models=PAGE_MODELS,
+        max_resident=None,
+        window=3600,
+        min_keep_alive=300,
+        per_request=120,
+        max_keep_alive=7200,
+    ):
+        self.scheduler = scheduler
+        self.loop = loop
+        self.base_url = base_url
+        self.models = list(models)
+        if max_resident is None:
+            # Ollama 서버와 같은 값: 동시에 올려둘 수 있는 모델 수
+            max_resident = int(os.environ.get("OLLAMA_MAX_LOADED_MODELS", 1))
+        self.max_resident = max_resident
+        self.window = window
+        self.min_keep_alive = min_keep_alive
+        self.per_request = per_request
+        self.max_keep_alive = max_keep_alive
+        self.requests = {}
+        self.loading = set()
+        self.tasks = set()
+        self.lock = threading.Lock()
+        self._resident = ({}, 0.0)
+        self._started = False
+
+    def record(self, model):
+        now = time.time()
+        with self.lock:
+            times = self.requests.setdefault(model, deque())
+            times.append(now)
+            while times[0] < now - self.window:
+                times.popleft()
+
+    def traffic(self, model):
+        now = time.time()
+        with self.lock:
+            return sum(1 for t in self.requests.get(model, ()) if t >= now - self.window)
+
+    def keep_alive(self, model):
+        return min(self.min_keep_alive + self.per_request * self.traffic(model), self.max_keep_alive)
+
+    def ranked(self):
+        # 최근 요청이 많은 순, 같으면 PAGE_MODELS 순서
+        with self.lock:
+            models = self.models + [model for model in self.requests if model not in self.models]
+        return sorted(models, key=self.traffic, reverse=True)
+
+    def residency(self, max_age=5):
+        # /api/ps: 지금 올라와 있는 모델과 내려갈 시각, 몇 초 동안은 재사용
+        resident, fetched = self._resident
+        if time.monotonic() - fetched < max_age:
+            return resident
+        try:
+            response = requests.get(f"{self.base_url}/api/ps", timeout=5)
+            response.raise_for_status()
+            resident = {model_tag(m["name"]): m.get("expires_at") for m in response.json().get("models", [])}
+        except requests.RequestException:
+            resident = {}
+        self._resident = (resident, time.monotonic())
+        return resident
+
+    def _load(self, model, keep_alive):
+        # prompt 없이 보내면 모델을 올리고 keep_alive만 설정함
+        response = requests.post(
+            f"{self.base_url}/api/generate",
+            json={"model": model, "keep_alive": keep_alive},
+            timeout=600,
+        )
+        response.raise_for_status()
+        self._resident = ({}, 0.0)
+
+    async def refresh(self, model):
+        try:
+            await asyncio.to_thread(self._load, model, self.keep_alive(model))
+        except requests.RequestException:
+            pass  # 워밍업이 실패해도 답변에는 영향 없음
+
+    async def preload(self, models):
+        try:
+            resident = await asyncio.to_thread(self.residency, 0)
+            for model in models:
+                if model_tag(model) not in resident:
+                    async with self.scheduler.slot(model):
+                        await self.refresh(model)
+        finally:
+            self.loading.difference_update(models)
+
+    def _submit(self, coroutine):
+        # event loop 스레드 밖에서도 안에서도 부를 수 있게
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        self.tasks.add(future)
+        future.add_done_callback(self.tasks.discard)
+
+    def start(self):
+        # 앱 시작 시 한 번: 가장 많이 쓰는(처음엔 PAGE_MODELS 앞쪽) 모델부터 올려둠
+        with self.lock:
+            if self._started:
+                return
+            self._started = True
+        models = self.ranked()[: self.max_resident]
+        self.loading.update(models)
+        self._submit(self.preload(models))
+
+    def warm(self, model):
+        # 페이지를 열었을 때: 다른 요청이 돌고 있지 않으면 질문을 입력하는 동안 미리 올림
+        if model in self.loading or model_tag(model) in self.residency() or not self.scheduler.idle():
+            return
+        self.loading.add(model)
+        self._submit(self.preload([model]))
+
+    def status(self):
+        resident = self.residency()
+        return [
+            {
+                "model": model,
+                "loaded": model_tag(model) in resident,
+                "expires_at": resident.get(model_tag(model)),
+                "recent requests": self.traffic(model),
+                "keep_alive (min)": self.keep_alive(model) / 60,
+            }
+            for model in self.ranked()
+        ]
+
+
+@st.cache_resource(show_spinner=False)
+def get_warmer():
+    return ModelWarmer(get_scheduler(), get_event_loop())
+
+
+def warm_model(model):
+    get_warmer().warm(model)